@@ -78,7 +78,5 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 
 
 def get_mongo_client():
-    from pymongo import MongoClient
-    mongo_url = os.getenv("mongo_url")
-    client = MongoClient(mongo_url)
-    return client
\ No newline at end of file
+    from src.database.mongo import mongo_manager
+    return mongo_manager.client
\ No newline at end of file
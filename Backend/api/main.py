@@ -11,6 +11,9 @@ from Backend.api.routers import auth, threads, files, chat, protocols, testing,
 from Backend.api.routers import scheduler
 from Backend.api.routers.ingestion import ingest
 from Backend.api.websocket.websocket_server import start_websocket_server  # Your custom WS server
+from src.MainAgent.agent import warm_up_main_agent
+from src.database.mongo import mongo_manager
+from src.vectorstore.embedders import warm_up_embedder
 
 logger = logging.getLogger(__name__)
 
@@ -28,16 +31,24 @@ async def lifespan(app: FastAPI):
     # Start WebSocket server in background
     ws_task = asyncio.create_task(start_websocket_server(host="0.0.0.0", port=8071))
     print("WebSocket server started on ws://0.0.0.0:8071")
+
+    # Build the main agent in the background so the first chat doesn't pay for it
+    warmup_task = asyncio.create_task(warm_up_main_agent())
+    # Load the FAISS query embedder once and keep it warm for the process
+    embedder_warmup_task = asyncio.create_task(asyncio.to_thread(warm_up_embedder))
     
     yield
     
     # Shutdown
     logger.info("Shutting down Synapse DeepAgent API...")
+    warmup_task.cancel()
+    embedder_warmup_task.cancel()
     ws_task.cancel()
     try:
         await ws_task
     except asyncio.CancelledError:
         logger.info("WebSocket server stopped")
+    await mongo_manager.close()
 
 
 # Initialize FastAPI with lifespan
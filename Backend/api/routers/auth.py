@@ -2,16 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from Backend.api import database, models, schemas, utils, auth
-from langgraph.store.mongodb import MongoDBStore
 import os
-from pymongo import MongoClient
+from src.database.mongo import mongo_manager
+from src.MainAgent.checkpointer import delete_thread_checkpoints
+from src.database.memory_store import get_user_store
+from src.database.profile_cache import invalidate_user_profile
 
 
 router = APIRouter(prefix="/admins", tags=["Authentication"])
 
-mongo_uri = os.getenv("MONGODB_URI")
-mongo_client = MongoClient(mongo_uri)
-mongo_db = mongo_client["Synapse_admins_info"] 
 
 
 def has_role(admin: models.Admin, role_name: str) -> bool:
@@ -19,12 +18,10 @@ def has_role(admin: models.Admin, role_name: str) -> bool:
     return any(role.name == role_name for role in admin.roles) 
 
 
-def save_user_info(user_info: dict, admin_username: str ) -> str:
+async def save_user_info(user_info: dict, admin_username: str ) -> str:
     """Save user information in the long-term store."""
     try:
-        long_term_store = MongoDBStore(
-            collection=mongo_db["synapse_agent_store"]
-        )
+        long_term_store = get_user_store()
         store = long_term_store
         user_id = admin_username
         
@@ -34,6 +31,7 @@ def save_user_info(user_info: dict, admin_username: str ) -> str:
         
         
         store.put(("users",), user_id, user_info)
+        await invalidate_user_profile(user_id)
         
         return "Successfully saved user info."
     except Exception as e:
@@ -43,12 +41,10 @@ def save_user_info(user_info: dict, admin_username: str ) -> str:
         return f"Error saving user info: {str(e)}"
 
 
-def update_user_roles_in_store(admin: models.Admin, db: Session) -> str:
+async def update_user_roles_in_store(admin: models.Admin, db: Session) -> str:
     """Update user roles and privileges in the long-term store."""
     try:
-        long_term_store = MongoDBStore(
-            collection=mongo_db["synapse_agent_store"]
-        )
+        long_term_store = get_user_store()
         
         # Get existing user info
         existing_item = long_term_store.get(("users",), admin.username)
@@ -88,6 +84,7 @@ def update_user_roles_in_store(admin: models.Admin, db: Session) -> str:
             user_info["role_description"] = "No roles assigned"
         
         long_term_store.put(("users",), admin.username, user_info)
+        await invalidate_user_profile(admin.username)
         return "Successfully updated user roles."
     except Exception as e:
         print(f"ERROR in update_user_roles_in_store: {e}")
@@ -133,7 +130,7 @@ async def register(admin_details: schemas.AdminCreate, db: Session = Depends(dat
         "email": new_admin.email,
     }
     try:
-        save_user_info(user_info, new_admin.username)
+        await save_user_info(user_info, new_admin.username)
     except Exception as e:
         raise HTTPException(status_code=500, detail="internal error saving user info")
     
@@ -214,7 +211,7 @@ async def add_role_to_admin(
     
     # Update MongoDB store with all roles and privileges
     try:
-        update_user_roles_in_store(user, db)
+        await update_user_roles_in_store(user, db)
     except Exception as e:
         print(f"Warning: Failed to update MongoDB: {e}")
     
@@ -262,7 +259,7 @@ async def remove_role_from_admin(
     
     # Update MongoDB store with remaining roles and privileges
     try:
-        update_user_roles_in_store(user, db)
+        await update_user_roles_in_store(user, db)
     except Exception as e:
         print(f"Warning: Failed to update MongoDB: {e}")
     
@@ -334,7 +331,7 @@ async def update_admin(
     
     # Update MongoDB store (only name and email, not password)
     try:
-        long_term_store = MongoDBStore(collection=mongo_db["synapse_agent_store"])
+        long_term_store = get_user_store()
         existing_item = long_term_store.get(("users",), user.username)
         
         if existing_item:
@@ -344,6 +341,7 @@ async def update_admin(
             if admin_update.email is not None:
                 user_info["email"] = user.email
             long_term_store.put(("users",), user.username, user_info)
+            await invalidate_user_profile(user.username)
     except Exception as e:
         print(f"Warning: Failed to update MongoDB: {e}")
         # Don't fail the request if MongoDB update fails
@@ -382,8 +380,9 @@ async def delete_admin(
     
     # Delete from MongoDB store
     try:
-        long_term_store = MongoDBStore(collection=mongo_db["synapse_agent_store"])
+        long_term_store = get_user_store()
         long_term_store.delete(("users",), username)
+        await invalidate_user_profile(username)
     except Exception as e:
         print(f"Warning: Failed to delete from MongoDB: {e}")
     
@@ -416,10 +415,7 @@ async def delete_admin(
             # MongoDB checkpoints cleanup
             thread_ids = [thread.uuid for thread in threads]
             try:
-                mongo_client_local = MongoClient(os.getenv("MONGODB_URI"))
-                mongo_db_memory = mongo_client_local["Synapse_memory_db"]
-                checkpoints_collection = mongo_db_memory["checkpoints"]
-                checkpoints_collection.delete_many({"thread_id": {"$in": thread_ids}})
+                delete_thread_checkpoints(mongo_manager.db("Synapse_memory_db"), thread_ids)
             except Exception as e:
                 print(f"MongoDB checkpoints cleanup failed: {e}")
     except Exception as e:
@@ -457,9 +453,7 @@ async def get_user_info_endpoint(username: str,
         raise HTTPException(status_code=401, detail="Unauthorized")
     
     try:
-        long_term_store = MongoDBStore(
-            collection=mongo_db["synapse_agent_store"]
-        )
+        long_term_store = get_user_store()
         
         # Retrieve data from store
         result = long_term_store.get(("users",), username)
@@ -25,7 +25,8 @@ async def get_chat_info():
         "message_format": "JSON",
         "supported_actions": [
             "auth", "set_thread", "file_start", "file_chunk", "file_end",
-            "image_start", "image_chunk", "image_end", "chat", "cancel"
+            "image_start", "image_chunk", "image_end", "chat", "cancel",
+            "fetch_tool_output"
         ],
         "features": [
             "JWT Authentication",
@@ -33,6 +34,7 @@ async def get_chat_info():
             "Chunked Image Upload with validation",
             "Real-time chat streaming",
             "Cancellation support via Redis",
+            "Truncated tool output previews with fetch on demand",
             "Image analysis integration"
         ],
         "upload_directory": "/tmp/ws_uploads",
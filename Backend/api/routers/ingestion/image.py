@@ -1,4 +1,5 @@
 from src.LLMs.AWS_LLMs.llms import sonnet_3_5_vision_llm 
+from src.LLMs.invoke import ainvoke
 import imghdr
 from PIL import Image
 import os, base64
@@ -36,7 +37,7 @@ class ImageProcessor:
                 {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_data}"}}
             ]
         )
-        result = self.llm.invoke([message])
+        result = await ainvoke(self.llm, [message])
         analysis = ""
         if isinstance(result.content, list):
             analysis = "".join(str(item.get("text", item)) if isinstance(item, dict) else str(item) for item in result.content)
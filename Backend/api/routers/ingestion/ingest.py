@@ -1,5 +1,6 @@
-from fastapi import APIRouter, UploadFile, BackgroundTasks, HTTPException , Depends 
+from fastapi import APIRouter, UploadFile, HTTPException , Depends 
 from uuid import uuid4
+import asyncio
 import shutil
 import os
 import logging
@@ -10,7 +11,8 @@ from Backend.api import auth
 import datetime
 from pathlib import Path
 
-from Backend.api.routers.ingestion.pipeline import ingest_pipeline , ingest_image
+from Backend.api.routers.ingestion.job_queue import INGEST_DEFAULT_PRIORITY, INGEST_PRIORITIES, enqueue_job
+from Backend.api.routers.ingestion.storing import VectorStoreManager
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +25,7 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 async def ingest_pdf(
     thread_id: str,
     file: UploadFile,
-    background_tasks: BackgroundTasks,
+    priority: str = INGEST_DEFAULT_PRIORITY,
     db: Session = Depends(get_db),
     current_user: models.Admin = Depends(auth.get_current_user)
 ):
@@ -50,6 +52,9 @@ async def ingest_pdf(
     
     if not thread_id:
         raise HTTPException(status_code=400, detail="thread_id is required")
+
+    if priority not in INGEST_PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(INGEST_PRIORITIES)}")
     
     job_id = str(uuid4())
     file_id = file.filename.replace(".pdf" , "") 
@@ -85,18 +90,13 @@ async def ingest_pdf(
     db.commit()
     db.refresh(new_file)
 
-    background_tasks.add_task(
-        ingest_pipeline,
-        job_id,
-        path,
-        file_id,
-        thread_id
-    )
+    # Parsing and embedding run in the ingestion worker processes, not in the API
+    await enqueue_job("pdf", job_id, path, file_id, thread_id, priority, admin_id=current_user.id)
 
     return {
         "job_id": job_id,
         "file_id": file_id,
-        "status": "started"
+        "status": "queued"
     }
 
 
@@ -104,7 +104,7 @@ async def ingest_pdf(
 async def image_ingest(
     thread_id: str,
     file: UploadFile,
-    background_tasks: BackgroundTasks,
+    priority: str = INGEST_DEFAULT_PRIORITY,
     db: Session = Depends(get_db),
     current_user: models.Admin = Depends(auth.get_current_user)
 ):
@@ -129,6 +129,9 @@ async def image_ingest(
     
     if not thread_id:
         raise HTTPException(status_code=400, detail="thread_id is required")
+
+    if priority not in INGEST_PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(INGEST_PRIORITIES)}")
     
     job_id = str(uuid4())
     file_id = file.filename.replace(".","_") + "_" + str(uuid4()) 
@@ -164,18 +167,47 @@ async def image_ingest(
     db.commit()
     db.refresh(new_file)
 
-    background_tasks.add_task(
-        ingest_image,
-        job_id,
-        path,
-        file_id,
-        thread_id
-    )
+    await enqueue_job("image", job_id, path, file_id, thread_id, priority, admin_id=current_user.id)
 
     return {
         "job_id": job_id,
         "file_id": file_id,
-        "status": "started"
+        "status": "queued"
     }
-    
-    
\ No newline at end of file
+
+
+@router.delete("/ingest/{thread_id}/{file_id}")
+async def delete_ingested_file(
+    thread_id: str,
+    file_id: str,
+    db: Session = Depends(get_db),
+    current_user: models.Admin = Depends(auth.get_current_user)
+):
+    """Remove an ingested file's chunks from the thread's vector index."""
+
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    thread = db.query(models.Thread).filter(
+        models.Thread.uuid == thread_id,
+        models.Thread.admin_id == current_user.id
+    ).first()
+    if not thread:
+        raise HTTPException(status_code=404, detail="Thread not found or access denied")
+
+    removed = await asyncio.to_thread(VectorStoreManager().delete_file, file_id, thread_id)
+    if not removed:
+        raise HTTPException(status_code=404, detail="File not found in this thread's index")
+
+    db.query(models.UploadedFiles).filter(
+        models.UploadedFiles.file_uuid == file_id,
+        models.UploadedFiles.thread_id == thread.id,
+        models.UploadedFiles.admin_id == current_user.id
+    ).delete()
+    db.commit()
+
+    return {
+        "file_id": file_id,
+        "status": "deleted"
+    }
+
@@ -0,0 +1,58 @@
+import os
+import json
+import time
+
+from Backend.api.routers.ingestion.status import redis_client, set_status
+
+
+# Checked in this order by workers, so a high priority job is always taken first
+INGEST_PRIORITIES = ("high", "normal", "low")
+INGEST_DEFAULT_PRIORITY = os.getenv("INGEST_DEFAULT_PRIORITY", "normal")
+INGEST_JOB_KINDS = ("pdf", "image")
+
+
+def queue_key(priority: str):
+    return f"ingestion:queue:{priority}"
+
+
+def processing_key(worker_id: str):
+    return f"ingestion:processing:{worker_id}"
+
+
+def heartbeat_key(worker_id: str):
+    return f"ingestion:worker:{worker_id}"
+
+
+async def enqueue_job(
+    kind: str,
+    job_id: str,
+    file_path: str,
+    file_id: str,
+    thread_id: str,
+    priority: str = INGEST_DEFAULT_PRIORITY,
+    admin_id: int | None = None,
+):
+    """Queue an ingestion job for the worker processes and mark it queued."""
+    if kind not in INGEST_JOB_KINDS:
+        raise ValueError(f"Unknown ingestion job kind: {kind}")
+    if priority not in INGEST_PRIORITIES:
+        raise ValueError(f"Unknown ingestion priority: {priority}")
+
+    job = {
+        "kind": kind,
+        "job_id": job_id,
+        "file_path": file_path,
+        "file_id": file_id,
+        "thread_id": thread_id,
+        "priority": priority,
+        # Scopes reuse of earlier uploads' chunks and embeddings
+        "admin_id": admin_id,
+        "enqueued_at": time.time(),
+    }
+    # Status first, so a worker that picks the job up at once can't be overwritten by "queued"
+    await set_status(job_id, "queued", 0, file_id, thread_id)
+    await redis_client.rpush(queue_key(priority), json.dumps(job))
+
+
+async def queue_lengths() -> dict:
+    return {priority: await redis_client.llen(queue_key(priority)) for priority in INGEST_PRIORITIES}
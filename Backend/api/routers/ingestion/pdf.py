@@ -1,7 +1,12 @@
-from langchain_community.document_loaders import PyPDFLoader
+import os
+from pypdf import PdfReader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
+# Pages extracted per parse task; tasks run in parallel in the ingestion process pool
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+
 class PdfProcessor:
     def __init__(self):
         self.splitter = RecursiveCharacterTextSplitter(
@@ -10,13 +15,26 @@ class PdfProcessor:
             separators=["\n\n", "\n", " ", ""]
         )
 
-    def load_and_chunk(self, path: str) -> list[Document]:
-        loader = PyPDFLoader(path)
-        pages = loader.load()
+    def page_count(self, path: str) -> int:
+        return len(PdfReader(path).pages)
 
+    def page_ranges(self, path: str, pages_per_task: int = PDF_PAGES_PER_TASK):
+        """(start, stop) page ranges covering the document, one per parse task."""
+        count = self.page_count(path)
+        return [(start, min(start + pages_per_task, count)) for start in range(0, count, pages_per_task)]
+
+    def iter_pages(self, path: str, start: int = 0, stop: int | None = None):
+        """Yield (page number, text) one page at a time, without loading the whole document."""
+        reader = PdfReader(path)
+        stop = len(reader.pages) if stop is None else stop
+        for i in range(start, stop):
+            yield i + 1, reader.pages[i].extract_text() or ""
+
+    def chunk_pages(self, path: str, start: int = 0, stop: int | None = None) -> list[Document]:
+        """Extract, clean and chunk a range of pages."""
         docs = []
-        for i, page in enumerate(pages):
-            text = self._clean(page.page_content)
+        for page_number, page_text in self.iter_pages(path, start, stop):
+            text = self._clean(page_text)
             if len(text) < 50:
                 continue
 
@@ -24,18 +42,17 @@ class PdfProcessor:
                 self.splitter.create_documents(
                     [text],
                     metadatas=[{
-                        "page": i + 1,
+                        "page": page_number,
                         "source": path
                     }]
                 )
             )
         return docs
 
+    def load_and_chunk(self, path: str) -> list[Document]:
+        return self.chunk_pages(path)
+
     def _clean(self, text: str) -> str:
         text = " ".join(text.split())
         text = text.replace("ﬁ", "fi").replace("ﬂ", "fl")
         return text
-
-
-
-
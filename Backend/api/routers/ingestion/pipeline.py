@@ -1,9 +1,14 @@
 import logging
 import os
+import asyncio
+import numpy as np
+from collections import deque
 from Backend.api.routers.ingestion.status import set_status
 from Backend.api.routers.ingestion.pdf import PdfProcessor
 from Backend.api.routers.ingestion.image import ImageProcessor
 from Backend.api.routers.ingestion.storing import VectorStoreManager
+from src.vectorstore.content_store import embed_with_cache, file_hash, get_file_manifest, save_file_manifest
+from langchain_core.documents import Document
 
 import logging
 import os
@@ -22,26 +27,171 @@ file_handler.setFormatter(formatter)
 
 logger.addHandler(file_handler)
 
+# Page-range parse tasks in flight at once; bounds how much of a large PDF is in memory
+PDF_PARSE_WINDOW = int(os.getenv("PDF_PARSE_WINDOW", "4"))
+# Chunks per embedding call; batches are embedded while later pages are still being parsed
+EMBED_BATCH_CHUNKS = int(os.getenv("EMBED_BATCH_CHUNKS", "64"))
+# Embedding calls in flight at once; parsing waits for one to finish beyond this
+EMBED_MAX_IN_FLIGHT = int(os.getenv("EMBED_MAX_IN_FLIGHT", "2"))
 
-async def ingest_pipeline(job_id: str, file_path: str, file_id: str, thread_id: str):
+# Process pool for parsing and embedding, installed by the ingestion worker.
+# Without one (e.g. when called from the API process) the steps run in a thread.
+_cpu_executor = None
+
+
+def set_cpu_executor(executor):
+    global _cpu_executor
+    _cpu_executor = executor
+
+
+async def run_cpu(func, *args):
+    if _cpu_executor is None:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(_cpu_executor, func, *args)
+
+
+def pdf_page_ranges(file_path: str):
+    return PdfProcessor().page_ranges(file_path)
+
+
+def parse_page_range(file_path: str, start: int, stop: int):
+    return PdfProcessor().chunk_pages(file_path, start, stop)
+
+
+def embedding_model(thread_id: str):
+    return VectorStoreManager().embedding_model(thread_id)
+
+
+def store_embedded(docs, vectors, model_name: str, file_id: str, thread_id: str):
+    VectorStoreManager().save_embedded(docs, vectors, model_name, file_id, thread_id)
+
+
+class StagedChunks:
+    """
+    A file's embedded chunks, staged until the whole file is published.
+
+    Chunk texts and metadata are kept as they arrive and vectors as float32
+    arrays, a fraction of the size of the Documents and float lists they come
+    from. ``publish`` adds the file to the thread index in one write, so
+    readers never see a half-ingested file and a failed ingestion leaves an
+    earlier version of the file untouched.
+    """
+
+    def __init__(self, model_name: str, file_id: str, thread_id: str):
+        self.model_name = model_name
+        self.file_id = file_id
+        self.thread_id = thread_id
+        self.texts, self.metadatas, self._vectors = [], [], []
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, docs, vectors):
+        self.texts.extend(d.page_content for d in docs)
+        self.metadatas.extend(d.metadata for d in docs)
+        self._vectors.append(np.asarray(vectors, dtype=np.float32))
+
+    async def publish(self):
+        docs = [Document(page_content=text, metadata=metadata) for text, metadata in zip(self.texts, self.metadatas)]
+        vectors = np.concatenate(self._vectors) if self._vectors else []
+        await run_cpu(store_embedded, docs, vectors, self.model_name, self.file_id, self.thread_id)
+
+
+async def parse_and_embed(job_id: str, file_path: str, file_id: str, thread_id: str, staged: StagedChunks, admin_id=None):
+    """
+    Parse the PDF in page ranges and embed its chunks in batches, all in parallel.
+
+    At most PDF_PARSE_WINDOW page ranges are parsed and EMBED_MAX_IN_FLIGHT
+    batches of EMBED_BATCH_CHUNKS chunks are embedded at once; results are
+    taken in page order, so chunks stay in document order. Embedding only runs
+    for chunks the admin has no stored vector for, and embedded batches are
+    moved to ``staged`` as they complete.
+    Returns the file's chunk texts and pages, for its manifest. Progress: 10-85%.
+    """
+    ranges = await run_cpu(pdf_page_ranges, file_path)
+    if not ranges:
+        raise ValueError("PDF has no pages")
+    total_pages = ranges[-1][1]
+
+    def parse(page_range):
+        return asyncio.ensure_future(run_cpu(parse_page_range, file_path, *page_range))
+
+    parsing = deque(parse(r) for r in ranges[:PDF_PARSE_WINDOW])
+    embedding = deque()
+    manifest, batch = [], []
+
+    async def drain(limit: int):
+        # Index finished batches, in order, until at most ``limit`` are in flight
+        while len(embedding) > limit:
+            chunks, task = embedding[0]
+            vectors = await task
+            embedding.popleft()
+            staged.add(chunks, vectors)
+
+    async def embed(chunks):
+        await drain(EMBED_MAX_IN_FLIGHT - 1)
+        manifest.extend({"text": d.page_content, "page": d.metadata.get("page")} for d in chunks)
+        task = asyncio.ensure_future(run_cpu(embed_with_cache, staged.model_name, admin_id, [d.page_content for d in chunks]))
+        embedding.append((chunks, task))
+
+    try:
+        for i, (_, stop) in enumerate(ranges):
+            chunks = await parsing.popleft()
+            if i + PDF_PARSE_WINDOW < len(ranges):
+                parsing.append(parse(ranges[i + PDF_PARSE_WINDOW]))
+
+            batch.extend(chunks)
+            while len(batch) >= EMBED_BATCH_CHUNKS:
+                await embed(batch[:EMBED_BATCH_CHUNKS])
+                batch = batch[EMBED_BATCH_CHUNKS:]
+            await set_status(job_id, "parsing", 10 + 75 * stop // total_pages, file_id, thread_id)
+        if batch:
+            await embed(batch)
+        await drain(0)
+        if not manifest:
+            raise ValueError("No documents extracted from PDF")
+        logger.info(f"Extracted {len(manifest)} chunks from {total_pages} PDF pages")
+        return manifest
+    finally:
+        for task in [*parsing, *(task for _, task in embedding)]:
+            task.cancel()
+
+
+async def stage_manifest(job_id: str, file_path: str, file_id: str, thread_id: str, staged: StagedChunks, manifest: list, admin_id=None):
+    """Stage a stored manifest's chunks in EMBED_BATCH_CHUNKS batches, reusing their stored vectors."""
+    for start in range(0, len(manifest), EMBED_BATCH_CHUNKS):
+        chunks = manifest[start:start + EMBED_BATCH_CHUNKS]
+        docs = [Document(page_content=c["text"], metadata={"page": c["page"], "source": file_path}) for c in chunks]
+        vectors = await run_cpu(embed_with_cache, staged.model_name, admin_id, [c["text"] for c in chunks])
+        staged.add(docs, vectors)
+        await set_status(job_id, "embedding", 60 + 25 * (start + len(chunks)) // len(manifest), file_id, thread_id)
+
+
+async def ingest_pipeline(job_id: str, file_path: str, file_id: str, thread_id: str, admin_id=None):
     """Process PDF ingestion pipeline with status tracking."""
     try:
-        await set_status(job_id, "uploaded", 10, file_id, thread_id)
+        await set_status(job_id, "uploaded", 5, file_id, thread_id)
         logger.info(f"Starting ingestion pipeline for job {job_id}")
 
-        processor = PdfProcessor()
-        await set_status(job_id, "parsing", 30, file_id, thread_id)
+        model_name = await asyncio.to_thread(embedding_model, thread_id)
+        content_hash = await asyncio.to_thread(file_hash, file_path)
+        manifest = None
+        if admin_id is not None:
+            manifest = await asyncio.to_thread(get_file_manifest, admin_id, model_name, content_hash)
 
-        docs = processor.load_and_chunk(file_path)
-        if not docs:
-            raise ValueError("No documents extracted from PDF")
-        
-        await set_status(job_id, "chunking", 50, file_id, thread_id)
-        logger.info(f"Extracted {len(docs)} chunks from PDF")
+        staged = StagedChunks(model_name, file_id, thread_id)
+        if manifest:
+            # Same bytes already ingested by this admin: reuse its chunks and stored vectors
+            logger.info(f"Reusing {len(manifest)} chunks of an identical upload for job {job_id}")
+            await set_status(job_id, "embedding", 60, file_id, thread_id)
+            await stage_manifest(job_id, file_path, file_id, thread_id, staged, manifest, admin_id)
+        else:
+            manifest = await parse_and_embed(job_id, file_path, file_id, thread_id, staged, admin_id)
+            if admin_id is not None:
+                await asyncio.to_thread(save_file_manifest, admin_id, model_name, content_hash, manifest)
 
-        store = VectorStoreManager()
-        store.save(docs, file_id, thread_id)
-        await set_status(job_id, "embedding", 80, file_id, thread_id) 
+        await set_status(job_id, "indexing", 90, file_id, thread_id)
+        await staged.publish()
 
         await set_status(job_id, "completed", 100, file_id, thread_id)
         logger.info(f"Successfully completed ingestion for job {job_id}")
@@ -58,25 +208,38 @@ async def ingest_pipeline(job_id: str, file_path: str, file_id: str, thread_id:
         await set_status(job_id, "failed", 0, file_id, thread_id, error=str(e))
 
 
-async def ingest_image(job_id: str, file_path: str, file_id: str, thread_id: str):
+async def ingest_image(job_id: str, file_path: str, file_id: str, thread_id: str, admin_id=None):
     """Process Image ingestion pipeline with status tracking."""
     try:
         await set_status(job_id, "uploaded", 10, file_id, thread_id)
         logger.info(f"starting image ingestion pipeline for job {job_id}")
 
-        processor = ImageProcessor()
+        model_name = await asyncio.to_thread(embedding_model, thread_id)
+        content_hash = await asyncio.to_thread(file_hash, file_path)
+        manifest = None
+        if admin_id is not None:
+            manifest = await asyncio.to_thread(get_file_manifest, admin_id, model_name, content_hash)
+
+        normalized_path = None
+        if manifest:
+            # Same image already analyzed for this admin: skip validation and the vision call
+            logger.info(f"Reusing the analysis of an identical image for job {job_id}")
+            analysis = manifest[0]["text"]
+        else:
+            processor = ImageProcessor()
 
-        await set_status(job_id, "validating", 30, file_id, thread_id)
-        await processor.validate_image(file_path)
+            await set_status(job_id, "validating", 30, file_id, thread_id)
+            await processor.validate_image(file_path)
 
-        await set_status(job_id, "normalizing", 50, file_id, thread_id)
-        normalized_path = await processor.normalize_image(file_path)
+            await set_status(job_id, "normalizing", 50, file_id, thread_id)
+            normalized_path = await processor.normalize_image(file_path)
 
-        await set_status(job_id, "analyzing", 70, file_id, thread_id)
-        analysis = await processor.analyze_image(normalized_path)
+            await set_status(job_id, "analyzing", 70, file_id, thread_id)
+            analysis = await processor.analyze_image(normalized_path)
+            if admin_id is not None:
+                await asyncio.to_thread(save_file_manifest, admin_id, model_name, content_hash, [{"text": analysis, "page": None}])
 
         # Create a document from the image analysis
-        from langchain_core.documents import Document
         doc = Document(
             page_content=analysis,
             metadata={
@@ -88,8 +251,8 @@ async def ingest_image(job_id: str, file_path: str, file_id: str, thread_id: str
         )
 
         await set_status(job_id, "embedding", 90, file_id, thread_id)
-        store = VectorStoreManager()
-        store.save([doc], file_id, thread_id)
+        vectors = await run_cpu(embed_with_cache, model_name, admin_id, [analysis])
+        await run_cpu(store_embedded, [doc], vectors, model_name, file_id, thread_id)
 
         await set_status(job_id, "completed", 100, file_id, thread_id)
         logger.info(f"Successfully completed image ingestion for job {job_id}")
@@ -98,7 +261,7 @@ async def ingest_image(job_id: str, file_path: str, file_id: str, thread_id: str
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
-            if os.path.exists(normalized_path):
+            if normalized_path and os.path.exists(normalized_path):
                 os.remove(normalized_path)
         except Exception as cleanup_error:
             logger.warning(f"Failed to cleanup files for job {job_id}: {cleanup_error}")
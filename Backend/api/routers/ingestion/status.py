@@ -3,6 +3,9 @@ import redis.asyncio as aioredis
 
 redis_client = aioredis.from_url("redis://localhost:6379", decode_responses=True)
 
+# Every status change is also published here, so watchers don't have to poll
+INGESTION_EVENTS_CHANNEL = "ingestion:events"
+
 def ingestion_key(job_id: str):
     return f"ingestion:{job_id}"
 
@@ -14,7 +17,7 @@ async def set_status(
     thread_id: str | None = None,
     error: str | None = None,
 ):
-    """Set ingestion job status in Redis."""
+    """Set ingestion job status in Redis and publish it to INGESTION_EVENTS_CHANNEL."""
     payload = {
         "state": state,
         "progress": progress,
@@ -22,7 +25,10 @@ async def set_status(
         "thread_id": thread_id,
         "error": error,
     }
-    await redis_client.set(ingestion_key(job_id), json.dumps(payload), ex=3600)  # 1 hour TTL
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.set(ingestion_key(job_id), json.dumps(payload), ex=3600)  # 1 hour TTL
+        pipe.publish(INGESTION_EVENTS_CHANNEL, json.dumps({"job_id": job_id, **payload}))
+        await pipe.execute()
 
 
 async def get_status(job_id: str) -> dict | None:
@@ -1,26 +1,100 @@
-from src.embedding.embedding import titan_embed_v1 
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-import os 
+import os
+import fcntl
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from src.vectorstore.index_cache import FAISS_BASE_DIR, faiss_cache, get_id_map, index_path, load_index
+from src.vectorstore.index_store import save_index_atomically
+from src.vectorstore.embedders import DEFAULT_EMBEDDING_MODEL, get_embedder, read_index_metadata
 
-embedding = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2" , model_kwargs={"device": "cpu"})
+# Writers to the same thread index are serialized (load, append, publish)
+_thread_locks = defaultdict(threading.Lock)
+FAISS_LOCKS_DIR = os.path.join(FAISS_BASE_DIR, ".locks")
+
+
+@contextmanager
+def thread_write_lock(thread_id):
+    """Exclusive write lock on a thread index, across threads and ingestion worker processes."""
+    os.makedirs(FAISS_LOCKS_DIR, exist_ok=True)
+    with _thread_locks[thread_id], open(os.path.join(FAISS_LOCKS_DIR, f"{thread_id}.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 
 class VectorStoreManager:
-    def __init__(self, base_dir="faiss"):
-        self.embeddings = embedding
+    def __init__(self, base_dir=FAISS_BASE_DIR):
         self.base_dir = base_dir
         os.makedirs(base_dir, exist_ok=True)
 
+    def _load_existing(self, thread_id):
+        """Return (index or None, embedding model, id map) for the thread."""
+        path = index_path(thread_id)
+        if not os.path.exists(os.path.join(path, "index.faiss")):
+            return None, DEFAULT_EMBEDDING_MODEL, {}
+        # Loaded fresh rather than from the cache: cached indexes are being searched
+        db = load_index(path)
+        return db, read_index_metadata(path)["model"], get_id_map(db)
+
+    def embedding_model(self, thread_id):
+        """The model new chunks for this thread must be embedded with."""
+        path = index_path(thread_id)
+        if not os.path.exists(os.path.join(path, "index.faiss")):
+            return DEFAULT_EMBEDDING_MODEL
+        return read_index_metadata(path)["model"]
+
     def save(self, docs, file_id, thread_id):
+        """Append a file's chunks to the thread index, replacing any earlier chunks of the same file."""
+        model_name = self.embedding_model(thread_id)
+        vectors = get_embedder(model_name).embed_documents([d.page_content for d in docs])
+        self.save_embedded(docs, vectors, model_name, file_id, thread_id)
+
+    def save_embedded(self, docs, vectors, model_name, file_id, thread_id):
+        """
+        Like ``save``, for chunks already embedded with ``model_name``.
+
+        The file is published in one write: the index is loaded, the file's
+        earlier chunks are replaced by the new ones and the result is swapped in
+        atomically, so the old version stays searchable until then.
+        """
         for d in docs:
             d.metadata["file_id"] = file_id
             d.metadata["thread_id"] = thread_id
 
-        db = FAISS.from_documents(docs, self.embeddings)
-        path = f"{self.base_dir}/{thread_id}"
-        db.save_local(path)
-        
+        texts = [d.page_content for d in docs]
+        metadatas = [d.metadata for d in docs]
+        ids = [f"{file_id}:{i}" for i in range(len(docs))]
+
+        with thread_write_lock(thread_id):
+            db, index_model, id_map = self._load_existing(thread_id)
+            # New chunks use the model the index was built with
+            embeddings = get_embedder(index_model)
+            if index_model != model_name:
+                # The index was created with another model after the chunks were embedded
+                vectors = embeddings.embed_documents(texts)
+
+            if db is not None and file_id in id_map:
+                db.delete(id_map.pop(file_id))
 
+            if db is None:
+                db = FAISS.from_embeddings(list(zip(texts, vectors)), embeddings, metadatas=metadatas, ids=ids)
+            else:
+                db.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+            id_map[file_id] = ids
 
+            save_index_atomically(thread_id, db, index_model, id_map)
+            faiss_cache.invalidate(thread_id)
 
+    def delete_file(self, file_id, thread_id) -> bool:
+        """Remove one file's chunks from the thread index. Returns False if the file isn't indexed."""
+        with thread_write_lock(thread_id):
+            db, model_name, id_map = self._load_existing(thread_id)
+            if db is None or file_id not in id_map:
+                return False
+            db.delete(id_map.pop(file_id))
+            save_index_atomically(thread_id, db, model_name, id_map)
+            faiss_cache.invalidate(thread_id)
+            return True
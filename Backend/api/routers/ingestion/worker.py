@@ -0,0 +1,150 @@
+"""
+Ingestion worker process.
+
+Runs ingestion jobs queued by the API, outside the API process:
+
+    python -m Backend.api.routers.ingestion.worker
+
+PDF parsing and embedding run in a process pool; each worker process handles up
+to INGEST_WORKER_CONCURRENCY jobs at a time. A job is taken by moving it from its
+queue to the worker's processing list in one LMOVE, and stays there until it
+finishes, so a worker whose heartbeat expires has its unfinished jobs re-queued
+by the next worker that starts or polls.
+"""
+import os
+import json
+import socket
+import asyncio
+import logging
+import multiprocessing
+from uuid import uuid4
+from concurrent.futures import ProcessPoolExecutor
+from redis.exceptions import ResponseError
+
+from Backend.api.routers.ingestion.status import redis_client, set_status
+from Backend.api.routers.ingestion.job_queue import INGEST_PRIORITIES, heartbeat_key, processing_key, queue_key
+from Backend.api.routers.ingestion.pipeline import ingest_image, ingest_pipeline, set_cpu_executor
+from src.vectorstore.embedders import warm_up_embedder
+
+logger = logging.getLogger(__name__)
+
+INGEST_WORKER_CONCURRENCY = int(os.getenv("INGEST_WORKER_CONCURRENCY", "2"))
+INGEST_PROCESS_POOL_SIZE = int(os.getenv("INGEST_PROCESS_POOL_SIZE", str(max(1, (os.cpu_count() or 2) // 2))))
+INGEST_HEARTBEAT_INTERVAL = int(os.getenv("INGEST_HEARTBEAT_INTERVAL", "10"))
+INGEST_HEARTBEAT_TTL = INGEST_HEARTBEAT_INTERVAL * 3
+# Idle workers look for jobs this often, and for orphaned jobs every INGEST_POLL_TIMEOUT seconds
+INGEST_IDLE_POLL_INTERVAL = float(os.getenv("INGEST_IDLE_POLL_INTERVAL", "0.5"))
+INGEST_POLL_TIMEOUT = int(os.getenv("INGEST_POLL_TIMEOUT", "5"))
+
+PIPELINES = {
+    "pdf": ingest_pipeline,
+    "image": ingest_image,
+}
+
+
+class IngestionWorker:
+    def __init__(self, concurrency: int = INGEST_WORKER_CONCURRENCY):
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+        self.concurrency = concurrency
+
+    async def _heartbeat(self):
+        while True:
+            await redis_client.set(heartbeat_key(self.worker_id), "1", ex=INGEST_HEARTBEAT_TTL)
+            await asyncio.sleep(INGEST_HEARTBEAT_INTERVAL)
+
+    async def recover_orphaned_jobs(self):
+        """Re-queue jobs held by workers whose heartbeat has expired."""
+        async for key in redis_client.scan_iter(match=processing_key("*")):
+            # "{worker}" or, mid-recovery, "{dead worker}:recovering:{recovering worker}"
+            worker_id, _, recovering_by = key.split(":", 2)[2].partition(":recovering:")
+            owner = recovering_by or worker_id
+            if owner == self.worker_id or await redis_client.exists(heartbeat_key(owner)):
+                continue
+            # Claimed by renaming, so two workers never re-queue the same jobs
+            claimed = f"{processing_key(worker_id)}:recovering:{self.worker_id}"
+            try:
+                await redis_client.rename(key, claimed)
+            except ResponseError:
+                continue
+            # Each job is moved, not copied, so a crash here leaves the rest in the claimed list
+            while (raw := await redis_client.lindex(claimed, 0)) is not None:
+                job = json.loads(raw)
+                logger.warning(f"Re-queueing job {job['job_id']} from dead worker {worker_id}")
+                await set_status(job["job_id"], "queued", 0, job["file_id"], job["thread_id"])
+                await redis_client.lmove(claimed, queue_key(job["priority"]), "LEFT", "RIGHT")
+
+    async def _take_job(self) -> str | None:
+        """Move the oldest job of the highest non-empty priority into this worker's processing list."""
+        for priority in INGEST_PRIORITIES:
+            raw = await redis_client.lmove(queue_key(priority), processing_key(self.worker_id), "LEFT", "RIGHT")
+            if raw is not None:
+                return raw
+        return None
+
+    async def _run_job(self, raw: str):
+        cancelled = False
+        try:
+            job = json.loads(raw)
+            pipeline = PIPELINES.get(job["kind"])
+            if pipeline is None:
+                await set_status(job["job_id"], "failed", 0, job["file_id"], job["thread_id"], error=f"Unknown job kind {job['kind']}")
+                return
+            logger.info(f"Worker {self.worker_id} running {job['kind']} job {job['job_id']} ({job['priority']})")
+            # Pipelines record their own progress and failures in the job status
+            await pipeline(job["job_id"], job["file_path"], job["file_id"], job["thread_id"], job.get("admin_id"))
+        except asyncio.CancelledError:
+            # Worker shutting down: the job stays in the processing list and is re-queued
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                await redis_client.lrem(processing_key(self.worker_id), 1, raw)
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        next_recovery = loop.time() + INGEST_POLL_TIMEOUT
+        while True:
+            raw = await self._take_job()
+            if raw is None:
+                if loop.time() >= next_recovery:
+                    await self.recover_orphaned_jobs()
+                    next_recovery = loop.time() + INGEST_POLL_TIMEOUT
+                await asyncio.sleep(INGEST_IDLE_POLL_INTERVAL)
+                continue
+            try:
+                await self._run_job(raw)
+            except Exception as e:
+                logger.error(f"Ingestion job failed in worker {self.worker_id}: {e}", exc_info=True)
+
+    async def run(self):
+        await redis_client.set(heartbeat_key(self.worker_id), "1", ex=INGEST_HEARTBEAT_TTL)
+        await self.recover_orphaned_jobs()
+        logger.info(f"Ingestion worker {self.worker_id} started with {self.concurrency} consumers")
+        tasks = [asyncio.create_task(self._heartbeat())]
+        tasks += [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await redis_client.delete(heartbeat_key(self.worker_id))
+
+
+async def main():
+    # Spawned, not forked: children must not inherit the event loop or Redis connections.
+    # Each child loads the embedding model once, up front.
+    executor = ProcessPoolExecutor(
+        max_workers=INGEST_PROCESS_POOL_SIZE,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=warm_up_embedder,
+    )
+    set_cpu_executor(executor)
+    try:
+        await IngestionWorker().run()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(name)s | %(message)s")
+    asyncio.run(main())
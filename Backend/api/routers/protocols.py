@@ -6,7 +6,7 @@ from Backend.api import schemas
 from sqlalchemy.orm import Session
 from Backend.api import models, auth
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from src.database.mongo import mongo_manager
 from langgraph.store.mongodb import MongoDBStore
 from src.embedding.embedding import titan_embed_v1
 from langgraph.store.mongodb.base import VectorIndexConfig
@@ -15,10 +15,7 @@ from datetime import datetime
 load_dotenv("Backend/api/.env")
 
 # Initialize MongoDB connection once
-mongo_uri = os.getenv("MONGODB_URI")
-
-mongo_client = MongoClient(mongo_uri)
-mongo_db = mongo_client["Synapse_memory_db"]  # Same DB as agent uses
+mongo_db = mongo_manager.db("Synapse_memory_db")  # Same DB as agent uses
 protocols_collection = mongo_db["synapse_agent_store"]
 
 router = APIRouter(prefix="/protocols" , tags=["Protocols"])
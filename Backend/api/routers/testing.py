@@ -11,6 +11,11 @@ from Backend.api.routers.ingestion.pipeline import ingest_pipeline
 from sqlalchemy.orm import Session
 from src.MainAgent.agent import get_main_agent
 from src.MainAgent.tools.memory_tools import Context
+from src.MCP.mcp import mcp_registry
+from src.database.mongo import mongo_manager
+from src.LLMs.invoke import llm_stats
+from src.vectorstore.index_cache import faiss_cache
+from Backend.api.routers.ingestion.job_queue import queue_lengths
 from pydantic import BaseModel, Field
 from typing import Optional
 
@@ -69,6 +74,46 @@ def get_file_context(file_ids: list, db: Session) -> str:
     return ""
 
 
+@router.get("/mcp_status")
+async def mcp_status(current_user: models.Admin = Depends(auth.get_current_user)):
+    """
+    MCP server health: discovery state plus per-server session latency and error counters.
+    """
+    return {"servers": mcp_registry.status()}
+
+
+@router.get("/mongo_pool")
+async def mongo_pool(current_user: models.Admin = Depends(auth.get_current_user)):
+    """
+    Shared Mongo connection pool: configured sizes plus open/checked-out connection counters.
+    """
+    return mongo_manager.stats()
+
+
+@router.get("/faiss_cache")
+async def faiss_cache_stats(current_user: models.Admin = Depends(auth.get_current_user)):
+    """
+    FAISS index cache: cached threads, memory use, hit/miss counts and load times.
+    """
+    return faiss_cache.stats()
+
+
+@router.get("/llm_calls")
+async def llm_calls(current_user: models.Admin = Depends(auth.get_current_user)):
+    """
+    LLM invocation layer: per-provider call counts, latency, timeouts, retries and remaining retry budget.
+    """
+    return llm_stats()
+
+
+@router.get("/ingestion_queue")
+async def ingestion_queue(current_user: models.Admin = Depends(auth.get_current_user)):
+    """
+    Ingestion job queue: jobs waiting per priority.
+    """
+    return await queue_lengths()
+
+
 @router.post("/chat/{thread_id}", response_model=ChatResponse)
 async def test_chat(
     request: ChatRequest,
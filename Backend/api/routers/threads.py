@@ -8,6 +8,10 @@ import boto3
 from dotenv import load_dotenv
 import os
 from pathlib import Path
+from src.database.mongo import mongo_manager
+from src.MainAgent.checkpointer import delete_thread_checkpoints
+from src.vectorstore.index_cache import faiss_cache, index_path
+from src.vectorstore.index_store import remove_index
 #load_dotenv("Backend/api/.env")
 
 env_path = Path(__file__).parent.parent.parent.parent / ".env"
@@ -130,33 +134,20 @@ async def delete_thread(
         print(f"S3 cleanup failed for thread {thread_id}: {e}")
     #---- MongoDB cleanup ----
     try:
-        from pymongo import MongoClient
-        import os
-        
-        mongo_uri = os.getenv("MONGODB_URI")
-        mongo_client = MongoClient(mongo_uri)
-        db_mongo = mongo_client["Synapse_memory_db"]
+        db_mongo = mongo_manager.db("Synapse_memory_db")
         
         # Clear short-term memory (checkpoints) for this thread
-        checkpoints_collection = db_mongo["checkpointing_db.checkpoints"]
-        checkpoint_writes_collection = db_mongo["checkpointing_db.checkpoint_writes"]
-        
-        delete_checkpoints = checkpoints_collection.delete_many({"thread_id": thread_id})
-        delete_writes = checkpoint_writes_collection.delete_many({"thread_id": thread_id})
+        deleted_checkpoints, deleted_writes = delete_thread_checkpoints(db_mongo, [thread_id])
         
-        if delete_checkpoints.deleted_count > 0 or delete_writes.deleted_count > 0:
-            print(f"Deleted {delete_checkpoints.deleted_count} checkpoints and {delete_writes.deleted_count} checkpoint writes for thread {thread_id} from MongoDB.")
+        if deleted_checkpoints > 0 or deleted_writes > 0:
+            print(f"Deleted {deleted_checkpoints} checkpoints and {deleted_writes} checkpoint writes for thread {thread_id} from MongoDB.")
     except Exception as e:
         print(f"MongoDB cleanup failed for thread {thread_id}: {e}")
     #---- FAISS cleanup ----
     try:
-        import shutil
-        faiss_path = f"faiss/{thread_id}"
-        if os.path.exists(faiss_path):
-            if os.path.isdir(faiss_path):
-                shutil.rmtree(faiss_path)
-            else:
-                os.remove(faiss_path)
+        faiss_cache.invalidate(thread_id)
+        if os.path.lexists(index_path(thread_id)):
+            remove_index(thread_id)
             print(f"Deleted FAISS directory for thread {thread_id}")
     except Exception as e:
         print(f"FAISS cleanup failed for thread {thread_id}: {e}")
@@ -208,34 +199,21 @@ async def delete_all_threads(
     # ---- MongoDB cleanup for all threads ----
     if thread_ids:
         try:
-            from pymongo import MongoClient
-            import os
-            
-            mongo_uri = os.getenv("MONGODB_URI")
-            mongo_client = MongoClient(mongo_uri)
-            db_mongo = mongo_client["Synapse_memory_db"]
+            db_mongo = mongo_manager.db("Synapse_memory_db")
             
             # Clear short-term memory (checkpoints) for all threads
-            checkpoints_collection = db_mongo["agent_checkpoints"]
-            checkpoint_writes_collection = db_mongo["checkpointing_db.checkpoint_writes"]
-            
-            delete_checkpoints = checkpoints_collection.delete_many({"thread_id": {"$in": thread_ids}})
-            delete_writes = checkpoint_writes_collection.delete_many({"thread_id": {"$in": thread_ids}})
+            deleted_checkpoints, deleted_writes = delete_thread_checkpoints(db_mongo, thread_ids)
             
-            print(f"Deleted {delete_checkpoints.deleted_count} checkpoints and {delete_writes.deleted_count} checkpoint writes for all threads from MongoDB.")
+            print(f"Deleted {deleted_checkpoints} checkpoints and {deleted_writes} checkpoint writes for all threads from MongoDB.")
         except Exception as e:
             print(f"MongoDB cleanup failed: {e}")
 
     # ---- FAISS cleanup for all threads ----
     try:
-        import shutil
         for thread_id in thread_ids:
-            faiss_path = f"faiss/{thread_id}"
-            if os.path.exists(faiss_path):
-                if os.path.isdir(faiss_path):
-                    shutil.rmtree(faiss_path)
-                else:
-                    os.remove(faiss_path)
+            faiss_cache.invalidate(thread_id)
+            if os.path.lexists(index_path(thread_id)):
+                remove_index(thread_id)
                 print(f"Deleted FAISS directory for thread {thread_id}")
     except Exception as e:
         print(f"FAISS cleanup failed: {e}")
@@ -2,7 +2,7 @@
 
 from Backend.api.websocket.websocket_server import start_websocket_server
 from Backend.api.websocket.chat_agent import stream_chat
-from Backend.api.websocket.redis_cancel import request_cancel, is_cancelled, clear_cancel
+from Backend.api.websocket.redis_cancel import request_cancel, is_cancelled, clear_cancel, cancellation_scope
 
 __all__ = [
     "start_websocket_server",
@@ -10,4 +10,5 @@ __all__ = [
     "request_cancel",
     "is_cancelled",
     "clear_cancel",
+    "cancellation_scope",
 ]
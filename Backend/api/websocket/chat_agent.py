@@ -1,11 +1,15 @@
 from src.MainAgent.tools.memory_tools import Context
-from Backend.api.websocket.redis_cancel import is_cancelled
+import asyncio
+import logging
+from Backend.api.websocket.redis_cancel import cancellation_scope
+from Backend.api.websocket.tool_outputs import tool_end_event
 from src.MainAgent.agent import get_main_agent
 from Backend.api.database import get_db
 from Backend.api.models import UploadedFiles
 from Backend.api.database import sessionLocal
 from Backend.api import models
 
+logger = logging.getLogger(__name__)
 
 
 async def update_thread_last_active(thread_id: str):
@@ -29,88 +33,93 @@ async def stream_chat(
     show_tools_responses: bool = False
 ):
     """Stream chat responses from the main agent with cancellation support."""
-    print(f"[DEBUG] stream_chat called with show_tools_responses={show_tools_responses} (type: {type(show_tools_responses)})")
-    try:
-        main_agent = await get_main_agent()
-        context = Context(
-            user_id=user_id,
-            user_name=user_name,
-            thread_id=thread_id,
-            files_ids=file_ids,
-            images_ids=[]
-        )
+    logger.debug("stream_chat.start thread_id=%s show_tools_responses=%s", thread_id, show_tools_responses)
+    async with cancellation_scope(thread_id) as cancel_token:
+        try:
+            main_agent = await get_main_agent()
+            context = Context(
+                user_id=user_id,
+                user_name=user_name,
+                thread_id=thread_id,
+                files_ids=file_ids,
+                images_ids=[]
+            )
         
-        # Build comprehensive file context information
-        file_context = ""
-        if file_ids:
-            db = next(get_db())
-            try:
-                files_ids = []
-                for idx, file_id in enumerate(file_ids, 1):
-                    file = db.query(UploadedFiles).filter(UploadedFiles.file_uuid == file_id).first()
-                    if file:
-                        file
+            # Build comprehensive file context information
+            file_context = ""
+            if file_ids:
+                db = next(get_db())
+                try:
+                    files_ids = []
+                    for idx, file_id in enumerate(file_ids, 1):
+                        file = db.query(UploadedFiles).filter(UploadedFiles.file_uuid == file_id).first()
+                        if file:
+                            file
                 
-                if files_ids:
-                    file_context = "\n\nThe user has uploaded the following files for context:\n" + "\n".join(files_ids)
+                    if files_ids:
+                        file_context = "\n\nThe user has uploaded the following files for context:\n" + "\n".join(files_ids)
                     
-            finally:
-                db.close()
+                finally:
+                    db.close()
         
-        # Append file context to user message
-        enhanced_message = message + file_context
+            # Append file context to user message
+            enhanced_message = message + file_context
         
-        async for event in main_agent.astream_events(
-            {"messages": [{"role": "user", "content": enhanced_message}], "thread_id": thread_id},
-            config={"configurable": {"thread_id": thread_id}},
-            context=context
-        ):
-            # Check cancellation
-            if await is_cancelled(thread_id):
-                yield {"type": "cancelled"}
-                return
-
-            kind = event["event"]
-            if kind == "on_chat_model_stream":
-                content = event["data"]["chunk"].content
-                if content:
-                    content_str = ""
-                    if isinstance(content, list):
-                        content_str = "".join(str(item.get("text", item)) if isinstance(item, dict) else str(item) for item in content)
-                    else:
-                        content_str = str(content)
-                    yield {"type": "content", "content": content_str}
+            async for event in main_agent.astream_events(
+                {"messages": [{"role": "user", "content": enhanced_message}], "thread_id": thread_id},
+                config={"configurable": {"thread_id": thread_id}},
+                context=context
+            ):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    if content:
+                        content_str = ""
+                        if isinstance(content, list):
+                            content_str = "".join(str(item.get("text", item)) if isinstance(item, dict) else str(item) for item in content)
+                        else:
+                            content_str = str(content)
+                        yield {"type": "content", "content": content_str}
                 
-            elif kind == "on_tool_start":
-                tool_name = event.get("name", "unknown_tool")
-                print(f"[DEBUG] Tool start detected: {tool_name}, show_tools_responses={show_tools_responses}")
-                if show_tools_responses:
-                    yield {"type": "tool_start", "tool_name": tool_name}
-            elif kind == "on_tool_end":
-                tool_name = event.get("name", "unknown_tool")
-                tool_output = event["data"].get("output", "")
-                print(f"[DEBUG] Tool end detected: {tool_name}, show_tools_responses={show_tools_responses}")
-                if show_tools_responses:
-                    yield {"type": "tool_end", "tool_name": tool_name, "output": str(tool_output)}
+                elif kind == "on_tool_start":
+                    tool_name = event.get("name", "unknown_tool")
+                    logger.debug("stream_chat.tool_start thread_id=%s tool=%s", thread_id, tool_name)
+                    if show_tools_responses:
+                        yield {"type": "tool_start", "tool_name": tool_name}
+                elif kind == "on_tool_end":
+                    tool_name = event.get("name", "unknown_tool")
+                    logger.debug("stream_chat.tool_end thread_id=%s tool=%s", thread_id, tool_name)
+                    if show_tools_responses:
+                        # Large results go out as a preview; the full text is fetched with fetch_tool_output
+                        yield await tool_end_event(
+                            event["run_id"], tool_name, event["data"].get("output", ""), user_id, thread_id
+                        )
 
-            elif kind == "on_chain_end":
-                output = event.get("data", {}).get("output", {})
-                # Extract only JSON-serializable data from output
-                tokens = {}
-                if isinstance(output, dict):
-                    # Try to extract token usage info if available
-                    if "usage_metadata" in output:
-                        tokens = output["usage_metadata"]
-                    elif "token_usage" in output:
-                        tokens = output["token_usage"]
-                yield {"type": "end", "tokens": tokens}
+                elif kind == "on_chain_end":
+                    output = event.get("data", {}).get("output", {})
+                    # Extract only JSON-serializable data from output
+                    tokens = {}
+                    if isinstance(output, dict):
+                        # Try to extract token usage info if available
+                        if "usage_metadata" in output:
+                            tokens = output["usage_metadata"]
+                        elif "token_usage" in output:
+                            tokens = output["token_usage"]
+                    yield {"type": "end", "tokens": tokens}
 
         
-    except Exception as e:
-        yield {"type": "error", "message": f"Chat error: {str(e)}"}
+        except asyncio.CancelledError:
+            if not cancel_token.cancelled:
+                raise
+            # Cancelled by request_cancel, which interrupts the running step; report it and end normally
+            asyncio.current_task().uncancel()
+            yield {"type": "cancelled"}
 
-    finally:
-        await update_thread_last_active(thread_id)
+        except Exception as e:
+            yield {"type": "error", "message": f"Chat error: {str(e)}"}
+
+        finally:
+            await update_thread_last_active(thread_id)
 
         
         
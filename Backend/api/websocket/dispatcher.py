@@ -0,0 +1,175 @@
+import os
+import json
+import asyncio
+import logging
+
+logger = logging.getLogger("ws_server")
+
+# Outgoing messages buffered per connection; producers wait when it is full
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+# Chat messages waiting behind the running one, per thread
+WS_CHAT_QUEUE_SIZE = int(os.getenv("WS_CHAT_QUEUE_SIZE", "4"))
+# Threads streaming at the same time on one connection
+WS_MAX_CONCURRENT_CHATS = int(os.getenv("WS_MAX_CONCURRENT_CHATS", "3"))
+WS_MAX_WATCHES = int(os.getenv("WS_MAX_WATCHES", "20"))
+# Consecutive content tokens of a thread are sent as one frame, flushed after this long or this size
+WS_STREAM_FLUSH_MS = float(os.getenv("WS_STREAM_FLUSH_MS", "30"))
+WS_STREAM_FLUSH_BYTES = int(os.getenv("WS_STREAM_FLUSH_BYTES", "512"))
+
+# Queued by close() so the writer flushes everything before it and stops
+_CLOSE = {"type": "_close"}
+
+
+class ConnectionDispatcher:
+    """
+    Runs a connection's long actions as tasks beside its message loop.
+
+    Each thread gets a chat worker that streams its queued messages one at a
+    time, so chats on different threads run concurrently while messages on
+    the same thread keep their order. Ingestion watches are separate tasks.
+    Everything sent to the client goes through one bounded queue and a single
+    writer task, so the read loop is always free to pick up control messages
+    such as cancel (see redis_cancel.request_cancel).
+
+    The writer buffers content tokens per thread and sends each thread's
+    buffer as one frame after WS_STREAM_FLUSH_MS or WS_STREAM_FLUSH_BYTES, or
+    before that thread's next non-content message, so streams on different
+    threads coalesce even when their tokens interleave. ``ws.send`` waits
+    while the socket's write buffer is over its limit, so a slow client fills
+    the bounded queue and then pauses its streams rather than growing memory.
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self._outgoing = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self._chat_queues = {}
+        self._chat_workers = {}
+        self._running_chats = {}
+        self._chat_slots = asyncio.Semaphore(WS_MAX_CONCURRENT_CHATS)
+        self._watches = set()
+        self._writer = asyncio.create_task(self._write())
+
+    async def _flush(self, pending: dict, thread_id):
+        """Send a thread's buffered content tokens as one frame."""
+        buffered = pending.pop(thread_id, None)
+        if buffered is not None:
+            first, parts, _, _ = buffered
+            await self.ws.send(json.dumps({**first, "content": "".join(parts)}))
+
+    async def _write(self):
+        # thread_id -> (first message, content parts, size in bytes, flush deadline)
+        pending = {}
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                timeout = None
+                if pending:
+                    timeout = max(0, min(deadline for *_, deadline in pending.values()) - loop.time())
+                try:
+                    message = await asyncio.wait_for(self._outgoing.get(), timeout)
+                except asyncio.TimeoutError:
+                    now = loop.time()
+                    for thread_id in [t for t, (*_, deadline) in pending.items() if deadline <= now]:
+                        await self._flush(pending, thread_id)
+                    continue
+
+                if message is _CLOSE:
+                    for thread_id in list(pending):
+                        await self._flush(pending, thread_id)
+                    return
+
+                thread_id = message.get("thread_id")
+                if message.get("type") == "content":
+                    if thread_id in pending:
+                        first, parts, size, deadline = pending[thread_id]
+                    else:
+                        first, parts, size, deadline = message, [], 0, loop.time() + WS_STREAM_FLUSH_MS / 1000
+                    parts.append(message["content"])
+                    size += len(message["content"].encode())
+                    pending[thread_id] = (first, parts, size, deadline)
+                    if size >= WS_STREAM_FLUSH_BYTES:
+                        await self._flush(pending, thread_id)
+                    continue
+
+                # Anything else for a thread goes out after that thread's buffered tokens
+                await self._flush(pending, thread_id)
+                await self.ws.send(json.dumps(message))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Socket gone; the read loop ends too and close() stops the producers
+            logger.info(f"WebSocket writer stopped: {e}")
+
+    async def send(self, message: dict):
+        if self._writer.done():
+            return
+        await self._outgoing.put(message)
+
+    async def _chat_worker(self, thread_id: str):
+        queue = self._chat_queues[thread_id]
+        try:
+            while True:
+                try:
+                    stream = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                async with self._chat_slots:
+                    task = asyncio.create_task(self._run_chat(thread_id, stream))
+                    self._running_chats[thread_id] = task
+                    try:
+                        await task
+                    except asyncio.CancelledError:
+                        # The stream was cancelled while waiting to send; the worker itself
+                        # is only cancelled when the connection closes
+                        if asyncio.current_task().cancelling():
+                            raise
+                        await self.send({"type": "cancelled", "thread_id": thread_id})
+                    finally:
+                        self._running_chats.pop(thread_id, None)
+        finally:
+            if self._chat_workers.get(thread_id) is asyncio.current_task():
+                del self._chat_workers[thread_id]
+                del self._chat_queues[thread_id]
+
+    async def _run_chat(self, thread_id: str, stream):
+        try:
+            async for chunk in stream:
+                # Tagged so a client streaming several threads can route each message
+                await self.send({**chunk, "thread_id": thread_id})
+        finally:
+            await stream.aclose()
+
+    def submit_chat(self, thread_id: str, stream) -> bool:
+        """Queue a chat stream (async iterator of messages) for a thread. False if the thread's queue is full."""
+        queue = self._chat_queues.setdefault(thread_id, asyncio.Queue(maxsize=WS_CHAT_QUEUE_SIZE))
+        try:
+            queue.put_nowait(stream)
+        except asyncio.QueueFull:
+            return False
+        if thread_id not in self._chat_workers:
+            self._chat_workers[thread_id] = asyncio.create_task(self._chat_worker(thread_id))
+        return True
+
+    def start_watch(self, coro) -> bool:
+        if len(self._watches) >= WS_MAX_WATCHES:
+            coro.close()
+            return False
+        task = asyncio.create_task(coro)
+        self._watches.add(task)
+        task.add_done_callback(self._watches.discard)
+        return True
+
+    async def close(self):
+        tasks = [*self._chat_workers.values(), *self._running_chats.values(), *self._watches]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Flush what is already queued (e.g. a final error) if the socket is still writable
+        if not self._writer.done():
+            try:
+                self._outgoing.put_nowait(_CLOSE)
+                await asyncio.wait_for(asyncio.shield(self._writer), timeout=1)
+            except (asyncio.QueueFull, asyncio.TimeoutError):
+                pass
+        self._writer.cancel()
+        await asyncio.gather(self._writer, return_exceptions=True)
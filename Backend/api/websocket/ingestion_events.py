@@ -0,0 +1,110 @@
+import os
+import json
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from Backend.api.routers.ingestion.status import INGESTION_EVENTS_CHANNEL, get_status, redis_client
+
+logger = logging.getLogger(__name__)
+
+# A watcher with no event for this long re-reads the job status, in case an event was lost
+INGESTION_WATCH_RESYNC = float(os.getenv("INGESTION_WATCH_RESYNC", "30"))
+TERMINAL_STATES = ("completed", "failed")
+
+
+class IngestionEventHub:
+    """
+    Fans ingestion status events out to WebSocket watchers.
+
+    The process holds one subscription to INGESTION_EVENTS_CHANNEL, opened when
+    the first job is watched, and routes each event to the queues of that job's
+    watchers. After (re)subscribing, the current status of every watched job is
+    re-read, so nothing published while the subscription was down is missed.
+    """
+
+    def __init__(self):
+        self._watchers = defaultdict(set)
+        self._listener = None
+        self._ready = asyncio.Event()
+
+    def _dispatch(self, event: dict):
+        for queue in self._watchers.get(event.get("job_id"), ()):
+            queue.put_nowait(event)
+
+    async def _resync(self):
+        for job_id in list(self._watchers):
+            status = await get_status(job_id)
+            if status:
+                self._dispatch({"job_id": job_id, **status})
+
+    async def _listen(self):
+        while True:
+            pubsub = redis_client.pubsub()
+            try:
+                await pubsub.subscribe(INGESTION_EVENTS_CHANNEL)
+                self._ready.set()
+                await self._resync()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._dispatch(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Ingestion event listener failed, resubscribing: {e}")
+                self._ready.clear()
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            self._ready.clear()
+            self._listener = asyncio.create_task(self._listen())
+
+    @asynccontextmanager
+    async def watch(self, job_id: str):
+        """Queue of status events for one job, for the duration of the block."""
+        queue = asyncio.Queue()
+        self._watchers[job_id].add(queue)
+        self._ensure_listener()
+        try:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                logger.warning("Ingestion event subscription not ready; relying on status resync")
+            yield queue
+        finally:
+            self._watchers[job_id].discard(queue)
+            if not self._watchers[job_id]:
+                del self._watchers[job_id]
+
+    async def events(self, job_id: str):
+        """
+        Yield the job's status until it reaches a terminal state.
+
+        Starts with the stored status (None if the job is unknown), then
+        yields each published change.
+        """
+        async with self.watch(job_id) as queue:
+            status = await get_status(job_id)
+            yield status
+            if not status or status["state"] in TERMINAL_STATES:
+                return
+            while True:
+                try:
+                    status = await asyncio.wait_for(queue.get(), timeout=INGESTION_WATCH_RESYNC)
+                except asyncio.TimeoutError:
+                    status = await get_status(job_id)
+                    if not status:
+                        return
+                yield status
+                if status["state"] in TERMINAL_STATES:
+                    return
+
+
+ingestion_events = IngestionEventHub()
@@ -1,37 +1,153 @@
-import redis.asyncio as redis
+import os
+import json
+import time
+import asyncio
 import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+import redis.asyncio as redis
 
 logger = logging.getLogger(__name__)
 
 REDIS_URL = "redis://localhost:6379"
 redis_client = redis.from_url(REDIS_URL, decode_responses=True)
 
+# Cancels are published here so every process can stop its own streams for the thread
+CANCEL_CHANNEL = "cancel:events"
+# Cancels also leave a short-lived key, so a process whose subscriber was not attached yet still sees them
+CANCEL_KEY_TTL = int(os.getenv("CANCEL_KEY_TTL", "10"))
+
+
 def cancel_key(thread_id: str) -> str:
     """Generate Redis key for cancellation flag."""
     if not thread_id:
         raise ValueError("thread_id cannot be empty")
     return f"cancel:{thread_id}"
 
+
+class CancellationToken:
+    """
+    Cancellation state of one running stream.
+
+    Checking it is a local flag read. Cancelling sets the flag and cancels the
+    task the stream runs in, so an in-flight ``astream_events`` step is
+    interrupted instead of finishing first.
+    """
+
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        self.task = asyncio.current_task()
+        self.event = asyncio.Event()
+        self.started_at = time.time()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self):
+        if self.event.is_set():
+            return
+        self.event.set()
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+
+# thread_id -> tokens of the streams running in this process
+_tokens = defaultdict(set)
+_listener_task = None
+
+
+def _cancel_local(thread_id: str) -> int:
+    tokens = list(_tokens.get(thread_id, ()))
+    for token in tokens:
+        token.cancel()
+    return len(tokens)
+
+
+async def _apply_pending_cancels():
+    """Cancel local streams that started before a cancel this process may have missed while unsubscribed."""
+    thread_ids = list(_tokens)
+    if not thread_ids:
+        return
+    requested = await redis_client.mget([cancel_key(thread_id) for thread_id in thread_ids])
+    for thread_id, requested_at in zip(thread_ids, requested):
+        if requested_at is None:
+            continue
+        for token in list(_tokens.get(thread_id, ())):
+            if token.started_at <= float(requested_at):
+                token.cancel()
+
+
+async def _listen_for_cancels():
+    """Apply cancels requested by any process to this process's streams."""
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(CANCEL_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] == "subscribe":
+                    # Only now are publishes guaranteed to reach us; catch up on the ones before
+                    await _apply_pending_cancels()
+                elif message["type"] == "message":
+                    _cancel_local(json.loads(message["data"])["thread_id"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cancel listener failed, resubscribing: {e}")
+            await asyncio.sleep(1)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+def _ensure_listener():
+    global _listener_task
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen_for_cancels())
+
+
+@asynccontextmanager
+async def cancellation_scope(thread_id: str):
+    """Register the current task's stream for a thread so it can be cancelled."""
+    _ensure_listener()
+    token = CancellationToken(thread_id)
+    _tokens[thread_id].add(token)
+    try:
+        yield token
+    finally:
+        _tokens[thread_id].discard(token)
+        if not _tokens[thread_id]:
+            del _tokens[thread_id]
+
+
 async def request_cancel(thread_id: str) -> None:
-    """Request cancellation for a thread."""
+    """
+    Request cancellation for a thread.
+
+    Its streams in this process stop at once. Other processes get the cancel
+    via pub/sub, and a short-lived key covers those whose subscriber is not
+    attached yet: they apply it to streams started before it once subscribed.
+    """
+    key = cancel_key(thread_id)
+    cancelled = _cancel_local(thread_id)
     try:
-        await redis_client.set(cancel_key(thread_id), "1", ex=60)
-        logger.info(f"Cancellation requested for thread {thread_id}")
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(key, time.time(), ex=CANCEL_KEY_TTL)
+        pipe.publish(CANCEL_CHANNEL, json.dumps({"thread_id": thread_id}))
+        await pipe.execute()
+        logger.info(f"Cancellation requested for thread {thread_id} ({cancelled} local stream(s))")
     except Exception as e:
-        logger.error(f"Failed to request cancel for thread {thread_id}: {e}")
+        logger.error(f"Failed to publish cancel for thread {thread_id}: {e}")
 
 async def is_cancelled(thread_id: str) -> bool:
-    """Check if thread has been cancelled."""
-    try:
-        return await redis_client.exists(cancel_key(thread_id)) == 1
-    except Exception as e:
-        logger.error(f"Failed to check cancel status for thread {thread_id}: {e}")
-        return False
+    """Check if a stream of the thread running in this process has been cancelled."""
+    return any(token.cancelled for token in _tokens.get(thread_id, ()))
 
 async def clear_cancel(thread_id: str) -> None:
-    """Clear cancellation flag for a thread."""
-    try:
-        await redis_client.delete(cancel_key(thread_id))
-        logger.info(f"Cancellation cleared for thread {thread_id}")
-    except Exception as e:
-        logger.error(f"Failed to clear cancel for thread {thread_id}: {e}")
+    """Clear cancellation flags for a thread's streams in this process."""
+    for token in _tokens.get(thread_id, ()):
+        token.event.clear()
+    logger.info(f"Cancellation cleared for thread {thread_id}")
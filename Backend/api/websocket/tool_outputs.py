@@ -0,0 +1,71 @@
+import os
+import json
+import logging
+
+from Backend.api.websocket.redis_cancel import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Tool results longer than this are streamed as a preview plus an output_id to fetch the rest
+TOOL_PREVIEW_CHARS = int(os.getenv("TOOL_PREVIEW_CHARS", "500"))
+TOOL_OUTPUT_TTL = int(os.getenv("TOOL_OUTPUT_TTL", "600"))
+TOOL_OUTPUT_MAX_CHARS = int(os.getenv("TOOL_OUTPUT_MAX_CHARS", str(2 * 1024 * 1024)))
+
+
+def tool_output_key(run_id: str) -> str:
+    return f"tool_output:{run_id}"
+
+
+def tool_output_text(output) -> str:
+    """Text of a tool result; ToolMessages contribute their content, not their repr."""
+    content = getattr(output, "content", output)
+    if isinstance(content, list):
+        return "".join(str(item.get("text", item)) if isinstance(item, dict) else str(item) for item in content)
+    return str(content)
+
+
+async def store_tool_output(run_id: str, user_id: str, thread_id: str, text: str) -> bool:
+    """Keep a full tool result for TOOL_OUTPUT_TTL seconds so its owner can fetch it."""
+    try:
+        await redis_client.set(
+            tool_output_key(run_id),
+            json.dumps({
+                "user_id": str(user_id),
+                "thread_id": thread_id,
+                "output": text[:TOOL_OUTPUT_MAX_CHARS],
+                "truncated": len(text) > TOOL_OUTPUT_MAX_CHARS,
+            }),
+            ex=TOOL_OUTPUT_TTL,
+        )
+        return True
+    except Exception as e:
+        logger.error("tool_output.store_failed run_id=%s error=%s", run_id, e)
+        return False
+
+
+async def fetch_tool_output(run_id: str, user_id: str) -> dict | None:
+    """The stored result, if it exists, has not expired and belongs to the user."""
+    data = await redis_client.get(tool_output_key(run_id))
+    if not data:
+        return None
+    record = json.loads(data)
+    if record["user_id"] != str(user_id):
+        return None
+    return record
+
+
+async def tool_end_event(run_id: str, tool_name: str, output, user_id: str, thread_id: str) -> dict:
+    """The tool_end message: the full output if short, otherwise a preview and a handle to fetch it."""
+    text = tool_output_text(output)
+    event = {"type": "tool_end", "tool_name": tool_name, "output": text}
+    if len(text) > TOOL_PREVIEW_CHARS and await store_tool_output(run_id, user_id, thread_id, text):
+        event.update({
+            "output": text[:TOOL_PREVIEW_CHARS],
+            "truncated": True,
+            "output_id": run_id,
+            "output_size": len(text),
+        })
+    elif len(text) > TOOL_PREVIEW_CHARS:
+        # Nowhere to fetch it from; the preview is all the client gets
+        event.update({"output": text[:TOOL_PREVIEW_CHARS], "truncated": True, "output_size": len(text)})
+    return event
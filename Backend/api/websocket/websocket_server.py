@@ -1,3 +1,4 @@
+import os
 import json
 import asyncio
 import logging
@@ -7,7 +8,9 @@ from Backend.api.database import get_db , sessionLocal
 from Backend.api import models
 from Backend.api.websocket.redis_cancel import request_cancel
 from Backend.api.websocket.chat_agent import stream_chat
-from Backend.api.routers.ingestion.status import get_status
+from Backend.api.websocket.ingestion_events import ingestion_events
+from Backend.api.websocket.dispatcher import ConnectionDispatcher
+from Backend.api.websocket.tool_outputs import fetch_tool_output
 from sqlalchemy.orm import Session
 
 
@@ -15,6 +18,9 @@ from sqlalchemy.orm import Session
 
 logger = logging.getLogger("ws_server")
 
+WS_COMPRESSION = os.getenv("WS_COMPRESSION", "deflate")
+WS_WRITE_LIMIT = int(os.getenv("WS_WRITE_LIMIT", str(64 * 1024)))
+
 
 
 
@@ -62,18 +68,63 @@ def retrieve_file_ids_for_thread_db(thread_id: str):
     
 
 
+async def watch_ingestion(dispatcher: ConnectionDispatcher, job_id: str):
+    """Forward a job's status events to the client until the job finishes."""
+    last = None
+    async for status in ingestion_events.events(job_id):
+        if not status:
+            await dispatcher.send({
+                "type": "error",
+                "message": "Job not found"
+            })
+            return
+
+        response = {
+            "type": "ingestion_status",
+            "job_id": job_id,
+            "state": status["state"],
+            "progress": status.get("progress", 0),
+            "file_id": status.get("file_id"),
+            "thread_id": status.get("thread_id"),
+        }
+        if response != last:
+            await dispatcher.send(response)
+            last = response
+
+
+async def load_thread_context(user_id, user_name, thread_id: str):
+    """Chat context for a thread the user owns, or None."""
+    if not await asyncio.to_thread(check_thread_ownership, user_id, thread_id):
+        return None
+    file_ids = await asyncio.to_thread(retrieve_file_ids_for_thread_db, thread_id)
+    return {
+        "thread_id": thread_id,
+        "file_ids": file_ids,
+        "user_id": str(user_id),  # Convert to string for Context
+        "user_name": user_name
+    }
+
+
 async def handle_client(ws):
-    """Handle WebSocket client connection with proper error handling."""
+    """
+    Handle a WebSocket client connection.
+
+    The read loop only handles control messages itself; chat streams and
+    ingestion watches run as tasks on the connection's dispatcher, so a cancel
+    or a message for another thread is read while a stream is in progress.
+    """
     context = None
+    contexts = {}
     user_id = None
     user_name = None
+    dispatcher = ConnectionDispatcher(ws)
     
     try:
         async for msg in ws:
             try:
                 data = json.loads(msg)
             except json.JSONDecodeError:
-                await ws.send(json.dumps({"type": "error", "message": "Invalid JSON"}))
+                await dispatcher.send({"type": "error", "message": "Invalid JSON"})
                 continue
 
             action = data.get("action")
@@ -83,154 +134,193 @@ async def handle_client(ws):
                 token = data.get("token")
                 user_data = verify_websocket_token(token)
                 if not user_data:
-                    await ws.send(json.dumps({"type": "error", "message": "Auth failed"}))
+                    await dispatcher.send({"type": "error", "message": "Auth failed"})
                     return
 
+                if user_id is not None and user_data["user_id"] != user_id:
+                    # Threads checked for the previous user aren't the new user's
+                    contexts.clear()
+                    context = None
                 user_id = user_data["user_id"]
                 user_name = user_data["user_name"]
 
-                await ws.send(json.dumps({
+                await dispatcher.send({
                     "type": "auth_ok",
                     "user_id": user_id,
                     "username": user_name
-                }))
+                })
 
             # ===== SET THREAD =====
             elif action == "set_thread":
                 thread_id = data.get("thread_id")
-                file_ids =  retrieve_file_ids_for_thread_db(thread_id) 
+                thread_context = await load_thread_context(user_id, user_name, thread_id)
 
-                if not check_thread_ownership(user_id, thread_id):
-                    await ws.send(json.dumps({
+                if not thread_context:
+                    await dispatcher.send({
                         "type": "error",
                         "message": "Invalid thread"
-                    }))
+                    })
                     continue
 
-                context = {
-                    "thread_id": thread_id,
-                    "file_ids": file_ids,
-                    "user_id": str(user_id),  # Convert to string for Context
-                    "user_name": user_name
-                }
+                context = contexts[thread_id] = thread_context
 
-                await ws.send(json.dumps({
+                await dispatcher.send({
                     "type": "thread_ok",
                     "thread_id": thread_id,
-                    "file_ids": file_ids
-                }))
+                    "file_ids": context["file_ids"]
+                })
 
             #===== ADD FILE =====
             elif action == "add_file":
                 file_id = data.get("file_id")
 
                 if not context:
-                    await ws.send(json.dumps({
+                    await dispatcher.send({
                         "type": "error",
                         "message": "Thread not initialized"
-                  }))
+                    })
                     continue
                 context["file_ids"].append(file_id)
 
-                await ws.send(json.dumps({
+                await dispatcher.send({
                     "type": "file_added",
                     "file_id": file_id
-                }))
+                })
 
             # ===== CHAT =====
             elif action == "chat":
-                if not context:
-                    await ws.send(json.dumps({
+                # Defaults to the current thread; another owned thread can be named explicitly
+                thread_id = data.get("thread_id") or (context and context["thread_id"])
+                if not thread_id:
+                    await dispatcher.send({
                         "type": "error",
                         "message": "Thread not initialized"
-                    }))
+                    })
                     continue
 
+                chat_context = contexts.get(thread_id)
+                if chat_context is None:
+                    chat_context = await load_thread_context(user_id, user_name, thread_id)
+                    if not chat_context:
+                        await dispatcher.send({
+                            "type": "error",
+                            "message": "Invalid thread"
+                        })
+                        continue
+                    contexts[thread_id] = chat_context
+
                 message = data.get("message")
                 show_tools_responses = data.get("show_tools_responses", False)
 
-                async for chunk in stream_chat(
-                    thread_id=context["thread_id"],
-                    user_id=context["user_id"],
-                    user_name=context["user_name"],
+                accepted = dispatcher.submit_chat(thread_id, stream_chat(
+                    thread_id=thread_id,
+                    user_id=chat_context["user_id"],
+                    user_name=chat_context["user_name"],
                     message=message,
-                    file_ids=context["file_ids"],
+                    file_ids=chat_context["file_ids"],
                     show_tools_responses=show_tools_responses
-                ):
-                    await ws.send(json.dumps(chunk))
+                ))
+                if not accepted:
+                    await dispatcher.send({
+                        "type": "error",
+                        "message": "Too many pending messages for this thread"
+                    })
                     
             # ===== STATUS =====
             elif action == "watch_ingestion":
                 job_id = data.get("job_id")
-                print(f"Starting to watch ingestion for job_id: {job_id}")
 
                 if not job_id:
-                    await ws.send(json.dumps({
+                    await dispatcher.send({
                         "type": "error",
                         "message": "job_id required"
-                    }))
+                    })
                     continue
 
-                while True:
-                    status = await get_status(job_id)
-                    print(f"Status for job {job_id}: {status}")
+                if not dispatcher.start_watch(watch_ingestion(dispatcher, job_id)):
+                    await dispatcher.send({
+                        "type": "error",
+                        "message": "Too many ingestion watches on this connection"
+                    })
+
+            # ===== TOOL OUTPUT =====
+            elif action == "fetch_tool_output":
+                output_id = data.get("output_id")
+                record = await fetch_tool_output(output_id, user_id) if output_id and user_id else None
 
-                    if not status:
-                        print(f"Job {job_id} not found in Redis")
-                        await ws.send(json.dumps({
-                            "type": "error",
-                            "message": "Job not found"
-                        }))
-                        break
-
-                    response = {
-                        "type": "ingestion_status",
-                        "job_id": job_id,
-                        "state": status["state"],
-                        "progress": status.get("progress", 0),
-                        "file_id": status.get("file_id"),
-                        "thread_id": status.get("thread_id"),
-                    }
-                    print(f"Sending status update: {response}")
-                    await ws.send(json.dumps(response))
-
-                    if status["state"] in ("completed", "failed"):
-                        print(f"Job {job_id} finished with state: {status['state']}")
-                        break
-
-                    await asyncio.sleep(1)
+                if not record:
+                    await dispatcher.send({
+                        "type": "error",
+                        "message": "Tool output not found or expired"
+                    })
+                    continue
+
+                await dispatcher.send({
+                    "type": "tool_output",
+                    "output_id": output_id,
+                    "thread_id": record["thread_id"],
+                    "output": record["output"],
+                    "truncated": record["truncated"],
+                })
 
             # ===== CANCEL =====
             elif action == "cancel":
-                if context:
-                    await request_cancel(context["thread_id"])
+                thread_id = data.get("thread_id") or (context and context["thread_id"])
+                if not user_id or not thread_id:
+                    await dispatcher.send({
+                        "type": "error",
+                        "message": "Not authenticated" if not user_id else "Thread not initialized"
+                    })
+                    continue
+
+                # Only threads the user owns can be cancelled; the cancel reaches every process
+                if thread_id not in contexts:
+                    cancel_context = await load_thread_context(user_id, user_name, thread_id)
+                    if not cancel_context:
+                        await dispatcher.send({
+                            "type": "error",
+                            "message": "Invalid thread"
+                        })
+                        continue
+                    contexts[thread_id] = cancel_context
+
+                await request_cancel(thread_id)
 
             # ===== UNKNOWN =====
             else:
-                await ws.send(json.dumps({
+                await dispatcher.send({
                     "type": "error",
                     "message": f"Unknown action: {action}"
-                }))
+                })
     
     except json.JSONDecodeError as e:
         logger.error(f"JSON decode error: {e}")
         try:
-            await ws.send(json.dumps({"type": "error", "message": "Invalid JSON format"}))
+            await dispatcher.send({"type": "error", "message": "Invalid JSON format"})
         except Exception:
             pass
     except Exception as e:
         logger.error(f"WebSocket error: {e}", exc_info=True)
         try:
-            await ws.send(json.dumps({"type": "error", "message": "Internal server error"}))
+            await dispatcher.send({"type": "error", "message": "Internal server error"})
         except Exception:
             pass
     finally:
+        await dispatcher.close()
         if user_id and context:
             logger.info(f"Client disconnected: user_id={user_id}, thread_id={context.get('thread_id')}")
 
 
 async def start_websocket_server(host="0.0.0.0", port=8071):
-    async with websockets.serve(handle_client, host, port):
+    async with websockets.serve(
+        handle_client,
+        host,
+        port,
+        # permessage-deflate; token frames are small and highly compressible
+        compression=None if WS_COMPRESSION == "none" else "deflate",
+        # ws.send waits once this many bytes are buffered for a client
+        write_limit=WS_WRITE_LIMIT,
+    ):
         logger.info(f"WebSocket running on ws://{host}:{port}")
         await asyncio.Future()
 
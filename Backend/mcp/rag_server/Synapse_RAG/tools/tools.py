@@ -1,6 +1,6 @@
 from langchain.tools import tool 
 from Backend.mcp.rag_server.Synapse_RAG.embedding.embedding import titan_embed_v1
-from pymongo import MongoClient
+from src.database.mongo import mongo_manager
 import os
 import yaml
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -9,9 +9,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# Initialize MongoDB connection
-MONGODB_URI = os.getenv("MONGODB_URI")
-client = MongoClient(MONGODB_URI)
+# Shared MongoDB connection pool for this process
+client = mongo_manager.client
 
 # Load collections from YAML file
 def load_collections():
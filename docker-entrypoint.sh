@@ -35,7 +35,12 @@ echo "   ✓ RAG Service MCP (port 3010)"
 echo ""
 echo "✅ All MCP servers started"
 
-sleep 30
+# PDF/image ingestion runs in its own process so parsing and embedding don't slow the API
+echo "📥 Starting ingestion worker..."
+python -m Backend.api.routers.ingestion.worker &
+
+# No need to wait for the MCP servers: tools are discovered lazily on first use
+# and servers that are not up yet are marked degraded and retried later.
 echo "🌐 Starting Main API on port 8070..."
 echo ""
 
@@ -0,0 +1,206 @@
+import os
+import time
+import random
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+
+from src.logging.logger import logger
+
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_MAX_BACKOFF = float(os.getenv("LLM_RETRY_MAX_BACKOFF", "10"))
+# Retries may add at most this fraction of successful calls as extra load on a provider
+LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+LLM_RETRY_BUDGET_MIN = float(os.getenv("LLM_RETRY_BUDGET_MIN", "10"))
+
+# Concurrent in-flight calls per provider
+PROVIDER_CONCURRENCY = {
+    "groq": int(os.getenv("LLM_CONCURRENCY_GROQ", "8")),
+    "bedrock": int(os.getenv("LLM_CONCURRENCY_BEDROCK", "4")),
+    "openai": int(os.getenv("LLM_CONCURRENCY_OPENAI", "8")),
+}
+DEFAULT_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY_DEFAULT", "4"))
+
+PROVIDER_CLASSES = {
+    "ChatGroq": "groq",
+    "ChatBedrock": "bedrock",
+    "ChatBedrockConverse": "bedrock",
+    "ChatOpenAI": "openai",
+}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_NAMES = ("Timeout", "RateLimit", "Connection", "Throttl", "ServiceUnavailable", "InternalServer")
+
+
+@dataclass
+class ProviderStats:
+    """Per-provider counters reported by the invocation layer."""
+
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    retries: int = 0
+    budget_exhausted: int = 0
+    in_flight: int = 0
+    total_latency: float = 0.0
+    last_error: str | None = None
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "budget_exhausted": self.budget_exhausted,
+            "in_flight": self.in_flight,
+            "avg_latency_ms": round(self.total_latency / self.calls * 1000, 2) if self.calls else None,
+            "last_error": self.last_error,
+        }
+
+
+class RetryBudget:
+    """
+    Token bucket bounding retries per provider.
+
+    Each success deposits ``ratio`` tokens and each retry withdraws one, so
+    while a provider is failing, retries stop once the budget is spent instead
+    of multiplying the load on it.
+    """
+
+    def __init__(self, ratio: float = LLM_RETRY_BUDGET_RATIO, minimum: float = LLM_RETRY_BUDGET_MIN):
+        self.ratio = ratio
+        self.capacity = minimum
+        self.tokens = minimum
+
+    def deposit(self):
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+_semaphores = {}
+_budgets = defaultdict(RetryBudget)
+_stats = defaultdict(ProviderStats)
+
+
+def provider_of(llm) -> str:
+    return PROVIDER_CLASSES.get(type(llm).__name__, "default")
+
+
+def _semaphore(provider: str) -> asyncio.Semaphore:
+    if provider not in _semaphores:
+        _semaphores[provider] = asyncio.Semaphore(PROVIDER_CONCURRENCY.get(provider, DEFAULT_CONCURRENCY))
+    return _semaphores[provider]
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status in RETRYABLE_STATUS:
+        return True
+    return any(name in type(error).__name__ for name in RETRYABLE_NAMES)
+
+
+async def _should_retry(provider: str, error: Exception, attempt: int, retries: int) -> bool:
+    stats = _stats[provider]
+    stats.errors += 1
+    stats.last_error = f"{type(error).__name__}: {error}"
+    if isinstance(error, asyncio.TimeoutError):
+        stats.timeouts += 1
+    if attempt >= retries or not is_retryable(error):
+        return False
+    if not _budgets[provider].withdraw():
+        stats.budget_exhausted += 1
+        logger.warning(f"LLM retry budget exhausted for {provider}, not retrying {type(error).__name__}")
+        return False
+    stats.retries += 1
+    backoff = min(LLM_RETRY_MAX_BACKOFF, 0.5 * 2 ** attempt) * random.uniform(0.5, 1)
+    logger.warning(f"LLM call to {provider} failed ({type(error).__name__}), retrying in {backoff:.1f}s")
+    await asyncio.sleep(backoff)
+    return True
+
+
+async def ainvoke(llm, input, *, timeout: float = LLM_TIMEOUT, retries: int = LLM_MAX_RETRIES, **kwargs):
+    """
+    ``llm.ainvoke`` under the provider's concurrency limit, with a per-attempt
+    timeout and budgeted retries of transient failures.
+    """
+    provider = provider_of(llm)
+    stats = _stats[provider]
+    attempt = 0
+    while True:
+        async with _semaphore(provider):
+            stats.in_flight += 1
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(llm.ainvoke(input, **kwargs), timeout=timeout)
+            except Exception as e:
+                error = e
+            else:
+                stats.calls += 1
+                stats.total_latency += time.perf_counter() - start
+                _budgets[provider].deposit()
+                return result
+            finally:
+                stats.in_flight -= 1
+        # Backoff happens outside the semaphore so waiting callers aren't blocked by it
+        if not await _should_retry(provider, error, attempt, retries):
+            raise error
+        attempt += 1
+
+
+async def astream(llm, input, *, timeout: float = LLM_TIMEOUT, retries: int = LLM_MAX_RETRIES, **kwargs):
+    """
+    ``llm.astream`` under the provider's concurrency limit.
+
+    ``timeout`` bounds the wait for each chunk. A failure is retried only
+    before the first chunk has been yielded; after that it is raised.
+    """
+    provider = provider_of(llm)
+    stats = _stats[provider]
+    attempt = 0
+    while True:
+        yielded = False
+        async with _semaphore(provider):
+            stats.in_flight += 1
+            start = time.perf_counter()
+            stream = llm.astream(input, **kwargs)
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(anext(stream), timeout=timeout)
+                    except StopAsyncIteration:
+                        break
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                error = e
+            else:
+                stats.calls += 1
+                stats.total_latency += time.perf_counter() - start
+                _budgets[provider].deposit()
+                return
+            finally:
+                stats.in_flight -= 1
+                await stream.aclose()
+        if not await _should_retry(provider, error, attempt, 0 if yielded else retries):
+            raise error
+        attempt += 1
+
+
+def llm_stats():
+    return {
+        provider: {
+            **stats.as_dict(),
+            "concurrency": PROVIDER_CONCURRENCY.get(provider, DEFAULT_CONCURRENCY),
+            "retry_tokens": round(_budgets[provider].tokens, 2),
+        }
+        for provider, stats in _stats.items()
+    }
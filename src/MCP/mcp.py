@@ -1,10 +1,13 @@
 import os
 import json
+import time
 import asyncio
 
 
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
 from ..logging.logger import logger
+from .session_pool import MCPSessionPool
 
 async def load_mcp_servers_async(config_path):
     """
@@ -36,31 +39,131 @@ async def load_mcp_servers_async(config_path):
 
 
 mcp_config_path = "src/MCP/MCP_local.json"
-mcp_servers = None
 
-_client = None
+# Per-server handshake budget and how long a degraded server is left alone before retrying
+MCP_DISCOVERY_TIMEOUT = float(os.getenv("MCP_DISCOVERY_TIMEOUT", "5"))
+MCP_DEGRADED_RETRY_INTERVAL = float(os.getenv("MCP_DEGRADED_RETRY_INTERVAL", "30"))
+
+
+class MCPToolRegistry:
+    """
+    Lazily discovers tools from the configured MCP servers.
+
+    Nothing is contacted at import time. The first call to get_tools() handshakes
+    with every server concurrently, each under its own timeout. Servers that fail
+    or time out are marked degraded instead of failing the whole discovery, and
+    can be retried in the background later.
+
+    Tools are bound to the session pool rather than to a fresh SSE session per
+    call, so delegated tool calls reuse one long-lived connection per server.
+    """
+
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self.servers = None
+        self.client = None
+        self.pool = None
+        self.tools_by_server = {}
+        self.degraded = {}  # server name -> {"error", "since", "retry_at"}
+        self.version = 0  # bumped whenever the set of available tools changes
+        self._discovered = False
+        self._lock = asyncio.Lock()
+        self._retry_task = None
+
+    async def _ensure_client(self):
+        if self.client is None:
+            self.servers = await load_mcp_servers_async(str(self.config_path))
+            self.client = MultiServerMCPClient(self.servers)
+            self.pool = MCPSessionPool(self.client)
+        return self.client
+
+    async def _discover_server(self, name):
+        start = time.perf_counter()
+        try:
+            tools = await asyncio.wait_for(
+                load_mcp_tools(
+                    self.pool.proxy(name),
+                    callbacks=self.client.callbacks,
+                    server_name=name
+                ),
+                timeout=MCP_DISCOVERY_TIMEOUT
+            )
+        except Exception as e:
+            now = time.monotonic()
+            since = self.degraded.get(name, {}).get("since", now)
+            self.degraded[name] = {
+                "error": repr(e),
+                "since": since,
+                "retry_at": now + MCP_DEGRADED_RETRY_INTERVAL
+            }
+            logger.warning(f"MCP server '{name}' is degraded: {e!r}")
+            return False
+
+        self.tools_by_server[name] = tools
+        self.degraded.pop(name, None)
+        logger.info(f"MCP server '{name}' discovered {len(tools)} tools in {time.perf_counter() - start:.2f}s")
+        return True
+
+    async def _discover(self, server_names=None):
+        await self._ensure_client()
+        names = server_names if server_names is not None else list(self.servers)
+        results = await asyncio.gather(*(self._discover_server(name) for name in names))
+        self._discovered = True
+        if any(results):
+            self.version += 1
+        return any(results)
+
+    async def discover(self, server_names=None):
+        """Discover tools from the given servers (all servers by default)."""
+        async with self._lock:
+            return await self._discover(server_names)
+
+    async def get_tools(self):
+        """Return the tools of every healthy server, discovering them on first use."""
+        if not self._discovered:
+            async with self._lock:
+                if not self._discovered:
+                    await self._discover()
+        return [tool for tools in self.tools_by_server.values() for tool in tools]
+
+    def schedule_degraded_retry(self):
+        """Retry degraded servers whose retry interval elapsed, without blocking the caller."""
+        now = time.monotonic()
+        due = [name for name, info in self.degraded.items() if info["retry_at"] <= now]
+        if not due or (self._retry_task is not None and not self._retry_task.done()):
+            return
+        self._retry_task = asyncio.create_task(self.discover(due))
+
+    def status(self):
+        """Return the discovery state and session pool counters of every configured server."""
+        servers = self.servers or {}
+        pool_report = self.pool.report() if self.pool is not None else {}
+        status = {}
+        for name in servers:
+            if name in self.degraded:
+                status[name] = {"state": "degraded", "error": self.degraded[name]["error"]}
+            elif name in self.tools_by_server:
+                status[name] = {"state": "ok", "tools": len(self.tools_by_server[name])}
+            else:
+                status[name] = {"state": "pending"}
+            if name in pool_report:
+                status[name]["session"] = pool_report[name]
+        return status
+
+
+mcp_registry = MCPToolRegistry(mcp_config_path)
+
 
 async def get_mcp_client():
-    global _client, mcp_servers
-    
-    if _client is None:
-        if mcp_servers is None:
-            mcp_servers = await load_mcp_servers_async(str(mcp_config_path))
-            print(mcp_servers)
-            print("MCP Servers loaded successfully.")
-        
-        _client = MultiServerMCPClient(mcp_servers)
-    return _client
+    return await mcp_registry._ensure_client()
 
 async def main():
-    client = await get_mcp_client()
-    all_mcp_tools = await client.get_tools()
+    all_mcp_tools = await mcp_registry.get_tools()
     logger.info(f"Total tools available from MCP servers: {len(all_mcp_tools)}")
     print(len(all_mcp_tools)) 
+    logger.info(f"MCP server status: {mcp_registry.status()}")
     return all_mcp_tools
 
-all_mcp_tools = asyncio.run(main())
-
 
 if __name__ == "__main__":
     asyncio.run(main())
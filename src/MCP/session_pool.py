@@ -0,0 +1,254 @@
+import os
+import time
+import random
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from ..logging.logger import logger
+
+
+MCP_CONNECT_TIMEOUT = float(os.getenv("MCP_CONNECT_TIMEOUT", "5"))
+MCP_PING_INTERVAL = float(os.getenv("MCP_PING_INTERVAL", "30"))
+MCP_RECONNECT_ATTEMPTS = int(os.getenv("MCP_RECONNECT_ATTEMPTS", "3"))
+MCP_RECONNECT_MAX_BACKOFF = float(os.getenv("MCP_RECONNECT_MAX_BACKOFF", "30"))
+
+
+@dataclass
+class ServerStats:
+    """Per-server counters reported by the session pool."""
+
+    calls: int = 0
+    errors: int = 0
+    reconnects: int = 0
+    total_latency: float = 0.0
+    last_latency: float | None = None
+    last_ping_latency: float | None = None
+    last_error: str | None = None
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "reconnects": self.reconnects,
+            "avg_latency_ms": round(self.total_latency / self.calls * 1000, 2) if self.calls else None,
+            "last_latency_ms": round(self.last_latency * 1000, 2) if self.last_latency is not None else None,
+            "last_ping_ms": round(self.last_ping_latency * 1000, 2) if self.last_ping_latency is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+class _PooledSession:
+    """
+    A single long-lived MCP session.
+
+    The session context is entered and exited by one dedicated task, because the
+    SSE transport uses anyio cancel scopes that must be closed by the task that
+    opened them.
+    """
+
+    def __init__(self, client: MultiServerMCPClient, server_name: str):
+        self.client = client
+        self.server_name = server_name
+        self.session = None
+        self.error = None
+        self.task = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+
+    @property
+    def alive(self):
+        return self.session is not None and self.task is not None and not self.task.done()
+
+    async def _run(self):
+        try:
+            async with self.client.session(self.server_name) as session:
+                self.session = session
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def open(self, timeout: float):
+        self.task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+        except BaseException:
+            self.close_nowait()
+            raise
+        if self.session is None:
+            raise self.error or ConnectionError(f"MCP session to '{self.server_name}' closed during handshake")
+        return self.session
+
+    def close_nowait(self):
+        self._closing.set()
+        if self.task is not None and not self.task.done() and self.session is None:
+            # Still handshaking: nothing to close gracefully
+            self.task.cancel()
+
+    async def close(self):
+        self.close_nowait()
+        if self.task is not None:
+            try:
+                await asyncio.wait_for(self.task, timeout=MCP_CONNECT_TIMEOUT)
+            except BaseException:
+                pass
+
+
+class PooledSessionProxy:
+    """
+    Session-like object handed to langchain-mcp-adapters.
+
+    Tools loaded through it route every call through the pool, so they keep
+    working across reconnects instead of being bound to one session object.
+    """
+
+    def __init__(self, pool: "MCPSessionPool", server_name: str):
+        self.pool = pool
+        self.server_name = server_name
+
+    async def list_tools(self, cursor=None, **kwargs):
+        session = await self.pool.get_session(self.server_name)
+        return await session.list_tools(cursor=cursor, **kwargs)
+
+    async def call_tool(self, name, arguments=None, **kwargs):
+        return await self.pool.call_tool(self.server_name, name, arguments, **kwargs)
+
+
+class MCPSessionPool:
+    """
+    Long-lived MCP sessions keyed by server name.
+
+    Sessions are opened on first use, kept alive with periodic pings and
+    reopened with exponential backoff when they drop. Tool calls are never
+    replayed automatically after a transport error (a tool may not be
+    idempotent, e.g. send_email); the broken session is discarded and the next
+    call reconnects.
+    """
+
+    def __init__(self, client: MultiServerMCPClient):
+        self.client = client
+        self.stats = defaultdict(ServerStats)
+        self._sessions = {}
+        self._locks = defaultdict(asyncio.Lock)
+        self._keepalive_task = None
+
+    def proxy(self, server_name: str) -> PooledSessionProxy:
+        return PooledSessionProxy(self, server_name)
+
+    async def get_session(self, server_name: str):
+        """Return a live session for the server, connecting if needed."""
+        pooled = self._sessions.get(server_name)
+        if pooled is not None and pooled.alive:
+            return pooled.session
+        async with self._locks[server_name]:
+            pooled = self._sessions.get(server_name)
+            if pooled is not None and pooled.alive:
+                return pooled.session
+            return await self._connect(server_name)
+
+    async def _connect(self, server_name: str):
+        stats = self.stats[server_name]
+        backoff = 0.5
+        for attempt in range(1, MCP_RECONNECT_ATTEMPTS + 1):
+            previous = self._sessions.pop(server_name, None)
+            if previous is not None:
+                await previous.close()
+                stats.reconnects += 1
+
+            pooled = _PooledSession(self.client, server_name)
+            try:
+                session = await pooled.open(MCP_CONNECT_TIMEOUT)
+            except Exception as e:
+                stats.errors += 1
+                stats.last_error = repr(e)
+                logger.warning(f"MCP session to '{server_name}' failed (attempt {attempt}/{MCP_RECONNECT_ATTEMPTS}): {e!r}")
+                if attempt == MCP_RECONNECT_ATTEMPTS:
+                    raise
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, MCP_RECONNECT_MAX_BACKOFF)
+                continue
+
+            self._sessions[server_name] = pooled
+            self._ensure_keepalive()
+            logger.info(f"MCP session to '{server_name}' established")
+            return session
+
+    async def call_tool(self, server_name: str, tool_name: str, arguments=None, **kwargs):
+        """Call a tool on the server's pooled session, recording latency and errors."""
+        stats = self.stats[server_name]
+        session = await self.get_session(server_name)
+        start = time.perf_counter()
+        try:
+            result = await session.call_tool(tool_name, arguments, **kwargs)
+        except Exception as e:
+            stats.errors += 1
+            stats.last_error = repr(e)
+            self._discard(server_name, session)
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            stats.calls += 1
+            stats.total_latency += latency
+            stats.last_latency = latency
+        if getattr(result, "isError", False):
+            stats.errors += 1
+        return result
+
+    def _discard(self, server_name: str, session):
+        pooled = self._sessions.get(server_name)
+        if pooled is not None and pooled.session is session:
+            self._sessions.pop(server_name, None)
+            pooled.close_nowait()
+
+    def _ensure_keepalive(self):
+        if self._keepalive_task is None or self._keepalive_task.done():
+            self._keepalive_task = asyncio.create_task(self._keepalive())
+
+    async def _keepalive(self):
+        while self._sessions:
+            await asyncio.sleep(MCP_PING_INTERVAL)
+            await asyncio.gather(*(self._ping(name) for name in list(self._sessions)))
+
+    async def _ping(self, server_name: str):
+        stats = self.stats[server_name]
+        pooled = self._sessions.get(server_name)
+        if pooled is None:
+            return
+        start = time.perf_counter()
+        try:
+            if not pooled.alive:
+                raise ConnectionError("session closed")
+            await asyncio.wait_for(pooled.session.send_ping(), timeout=MCP_CONNECT_TIMEOUT)
+            stats.last_ping_latency = time.perf_counter() - start
+        except Exception as e:
+            stats.errors += 1
+            stats.last_error = repr(e)
+            logger.warning(f"MCP keep-alive ping to '{server_name}' failed, reconnecting: {e!r}")
+            async with self._locks[server_name]:
+                try:
+                    await self._connect(server_name)
+                except Exception as connect_error:
+                    logger.error(f"MCP reconnect to '{server_name}' failed: {connect_error!r}")
+
+    def is_connected(self, server_name: str) -> bool:
+        pooled = self._sessions.get(server_name)
+        return pooled is not None and pooled.alive
+
+    def report(self):
+        """Return per-server connection state, latency and error counters."""
+        return {
+            name: {"connected": self.is_connected(name), **stats.as_dict()}
+            for name, stats in self.stats.items()
+        }
+
+    async def close(self):
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(pooled.close() for pooled in sessions))
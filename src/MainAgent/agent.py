@@ -1,7 +1,9 @@
 import asyncio
+import importlib
 import os
-from pymongo import MongoClient
-from src.SubAgents.subAgents import task_tool 
+import time
+from src.SubAgents.subAgents import SubAgents
+from src.MCP.mcp import mcp_registry
 from src.LLMs.GroqLLMs.llms import groq_moonshotai_llm 
 from src.embedding.embedding import titan_embed_v1
 from src.LLMs.OpenAI_LLMs.llms import openai_gpt4_llm
@@ -14,10 +16,17 @@ from src.MainAgent.tools.documents_tools import(
     search_retrieve_faiss ,
     list_documents_in_thread
 )
-from src.Prompts.prompts import  TODO_USAGE_INSTRUCTIONS , GENERAL_INSTRUCTIONS_ABOUT_SPECIFIC_TASKS_WHEN_CALLING_SUB_AGENTS, DOCUMENTS_TOOL_DESCRIPTION  ,  TASK_DESCRIPTION_PREFIX , MEMORY_TOOL_INSTRUCTIONS , URLS_PROTOCOL , SCHADULE_JOBS_INSTRUCTIONS
+from src.Prompts import prompts
+from src.logging.logger import logger
 from langchain.agents import create_agent
 #from langgraph.checkpoint.memory import InMemorySaver 
-from langgraph.checkpoint.mongodb import MongoDBSaver
+from src.MainAgent.checkpointer import (
+    CHECKPOINT_BLOBS_COLLECTION,
+    CHECKPOINT_WRITES_COLLECTION,
+    CHECKPOINTS_COLLECTION,
+    CompactingMongoDBSaver,
+)
+from src.database.mongo import mongo_manager
 from langgraph.store.mongodb import MongoDBStore
 from langgraph.store.mongodb.base import VectorIndexConfig
 from langchain.agents.middleware import SummarizationMiddleware #, HumanInTheLoopMiddleware
@@ -30,18 +39,29 @@ from src.MainAgent.tools.memory_tools import (
 )
 
 
+# Prompt and tool config files; the cached agent is rebuilt when any of them changes
+AGENT_SOURCE_PATHS = [
+    "src/Prompts/prompts.py",
+    "src/SubAgents/configs",
+]
+AGENT_RELOAD_CHECK_INTERVAL = float(os.getenv("AGENT_RELOAD_CHECK_INTERVAL", "5"))
+INSTRUCTIONS_PATH = "src/Prompts/main_agent_instructions.txt"
+
+
 
 class MainAgent: 
     def __init__(self):
         load_dotenv("../.env")  # Load environment variables from .env file
-        mongo_uri = os.getenv("MONGODB_URI")
-        self.mongo_client = MongoClient(mongo_uri)
+        self.mongo_client = mongo_manager.client
         self.db = self.mongo_client["Synapse_memory_db"]
 
-        # Short-term / episodic memory
-        self.mongo_memory = MongoDBSaver(
-            self.db,
-            collection_name="agent_checkpoints"
+        # Short-term / episodic memory (same collections the previous MongoDBSaver wrote to)
+        self.mongo_memory = CompactingMongoDBSaver(
+            self.mongo_client,
+            db_name="Synapse_memory_db",
+            checkpoint_collection_name=CHECKPOINTS_COLLECTION,
+            writes_collection_name=CHECKPOINT_WRITES_COLLECTION,
+            blobs_collection_name=CHECKPOINT_BLOBS_COLLECTION,
         )
 
         # Long-term / semantic store 
@@ -57,7 +77,7 @@ class MainAgent:
         )
     
     async def main_agent_tools(self):
-        delegation_tools = [task_tool] 
+        delegation_tools = await SubAgents().create_task_tools()
         built_in_tools = [
             write_todos, read_todos, 
             get_user_info,
@@ -77,27 +97,28 @@ class MainAgent:
 
         INSTRUCTIONS = (
         "# TODO MANAGEMENT\n"
-        + TODO_USAGE_INSTRUCTIONS
+        + prompts.TODO_USAGE_INSTRUCTIONS
         + "\n\n"
         + "# TOOLS DESCRIPTION\n"
-        + TASK_DESCRIPTION_PREFIX.format(other_agents="Database_Agent, Database_Analyzer_Agent, External_Communication_Agent, AWS_S3_Agent, Analysis_Agent, Calendar_Agent, Auth_Agent, Web_Search_Agent, RAG_Agent, Scheduler_Agent")
+        + prompts.TASK_DESCRIPTION_PREFIX.format(other_agents="Database_Agent, Database_Analyzer_Agent, External_Communication_Agent, AWS_S3_Agent, Analysis_Agent, Calendar_Agent, Auth_Agent, Web_Search_Agent, RAG_Agent, Scheduler_Agent")
+        + "\n\n"
+        + prompts.PARALLEL_DELEGATION_INSTRUCTIONS
         + "\n\n"
-        + MEMORY_TOOL_INSTRUCTIONS
+        + prompts.MEMORY_TOOL_INSTRUCTIONS
         + "\n\n"
-        + URLS_PROTOCOL
+        + prompts.URLS_PROTOCOL
         + "\n\n"
-        + DOCUMENTS_TOOL_DESCRIPTION
+        + prompts.DOCUMENTS_TOOL_DESCRIPTION
         + "\n\n"
         + "CRITICAL: You MUST use write_todos tool for ANY user request to create a plan before proceeding.\n"
         + "=" * 80
         + "\n\n"
         + "# SUB-AGENT DELEGATION\n"
-        + GENERAL_INSTRUCTIONS_ABOUT_SPECIFIC_TASKS_WHEN_CALLING_SUB_AGENTS  
+        + prompts.GENERAL_INSTRUCTIONS_ABOUT_SPECIFIC_TASKS_WHEN_CALLING_SUB_AGENTS  
         + "\n\n"
-        + SCHADULE_JOBS_INSTRUCTIONS
+        + prompts.SCHADULE_JOBS_INSTRUCTIONS
         )
-        with open("src/Prompts/main_agent_instructions.txt", "w", encoding="utf-8") as f:
-            f.write(INSTRUCTIONS)
+        await asyncio.to_thread(_write_instructions_if_changed, INSTRUCTIONS)
         return INSTRUCTIONS
 
     async def create_main_agent(self):
@@ -130,19 +151,89 @@ class MainAgent:
         return agent
 
 
-# Lazy initialization pattern for production
+def _write_instructions_if_changed(instructions: str):
+    """Persist the rendered instructions only when they differ from the file on disk."""
+    if os.path.exists(INSTRUCTIONS_PATH):
+        with open(INSTRUCTIONS_PATH, "r", encoding="utf-8") as f:
+            if f.read() == instructions:
+                return
+    with open(INSTRUCTIONS_PATH, "w", encoding="utf-8") as f:
+        f.write(instructions)
+
+
+def _agent_sources_fingerprint():
+    """Return the modification times of the prompt and tool config files."""
+    fingerprint = []
+    for path in AGENT_SOURCE_PATHS:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                file_path = os.path.join(path, name)
+                fingerprint.append((file_path, os.path.getmtime(file_path)))
+        elif os.path.exists(path):
+            fingerprint.append((path, os.path.getmtime(path)))
+    return tuple(fingerprint)
+
+
+# Lazy initialization pattern for production: one compiled agent per process.
+# The MainAgent instance (Mongo client, checkpointer, store) is created once and
+# kept across hot reloads; only the compiled agent is rebuilt.
 _main_agent = None
+_main_agent_resources = None
+_main_agent_fingerprint = None
+_main_agent_mcp_version = None
+_last_reload_check = 0.0
 _agent_lock = asyncio.Lock()
 
 async def get_main_agent():
-    """Get or create the main agent instance (lazy initialization)."""
-    global _main_agent
+    """Get the process-wide main agent, rebuilding it when prompts, tool configs or MCP tools change."""
+    global _main_agent, _main_agent_resources, _main_agent_fingerprint, _main_agent_mcp_version, _last_reload_check
+
+    # Fast path: skip the file checks between reload intervals
+    if _main_agent is not None and time.monotonic() - _last_reload_check < AGENT_RELOAD_CHECK_INTERVAL:
+        return _main_agent
+
     async with _agent_lock:
-        if _main_agent is None:
-            _main_agent = await MainAgent().create_main_agent()
+        _last_reload_check = time.monotonic()
+        # Degraded MCP servers are retried in the background; a recovery bumps the registry version
+        mcp_registry.schedule_degraded_retry()
+        fingerprint = await asyncio.to_thread(_agent_sources_fingerprint)
+        if (
+            _main_agent is not None
+            and fingerprint == _main_agent_fingerprint
+            and mcp_registry.version == _main_agent_mcp_version
+        ):
+            return _main_agent
+
+        try:
+            if _main_agent is not None and fingerprint != _main_agent_fingerprint:
+                logger.info("Prompts or tool configs changed, reloading main agent")
+                importlib.reload(prompts)
+            if _main_agent_resources is None:
+                _main_agent_resources = await asyncio.to_thread(MainAgent)
+            _main_agent = await _main_agent_resources.create_main_agent()
+            _main_agent_fingerprint = fingerprint
+            _main_agent_mcp_version = mcp_registry.version
+        except Exception as e:
+            if _main_agent is None:
+                raise
+            # Keep serving the previous agent if the new prompts/configs are broken
+            logger.error(f"Failed to reload main agent, keeping previous version: {e}")
+            _main_agent_fingerprint = fingerprint
+            _main_agent_mcp_version = mcp_registry.version
         return _main_agent
 
 
+async def warm_up_main_agent():
+    """Build the main agent ahead of the first request."""
+    start = time.perf_counter()
+    try:
+        await get_main_agent()
+        logger.info(f"Main agent warmed up in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        # The first request will retry the build
+        logger.error(f"Main agent warm-up failed: {e}")
+
+
 async def main():
     main_agent = await MainAgent().create_main_agent()
     result = await main_agent.ainvoke(
@@ -0,0 +1,322 @@
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from langgraph.checkpoint.base.id import UUID
+from langgraph.checkpoint.mongodb import MongoDBSaver
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+from src.logging.logger import logger
+from src.States.state import FileMap
+
+
+# Retention policy applied by the background compactor
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "20"))
+CHECKPOINT_SNAPSHOT_INTERVAL = int(os.getenv("CHECKPOINT_SNAPSHOT_INTERVAL", "3600"))
+CHECKPOINT_COMPACT_INTERVAL = float(os.getenv("CHECKPOINT_COMPACT_INTERVAL", "300"))
+# Unreferenced blobs younger than this are kept: a concurrent put writes its blobs before its checkpoint
+CHECKPOINT_BLOB_GRACE_SECONDS = int(os.getenv("CHECKPOINT_BLOB_GRACE_SECONDS", "600"))
+
+# Collections of the main agent's checkpointer (Synapse_memory_db)
+CHECKPOINTS_COLLECTION = "checkpointing_db.checkpoints"
+CHECKPOINT_WRITES_COLLECTION = "checkpointing_db.checkpoint_writes"
+CHECKPOINT_BLOBS_COLLECTION = "checkpointing_db.checkpoint_blobs"
+
+
+def delete_thread_checkpoints(db, thread_ids: list[str]) -> tuple[int, int]:
+    """Delete the checkpoints, pending writes and blobs of threads. Returns (checkpoints, writes) deleted."""
+    scope = {"thread_id": {"$in": list(thread_ids)}}
+    deleted_checkpoints = db[CHECKPOINTS_COLLECTION].delete_many(scope).deleted_count
+    deleted_writes = db[CHECKPOINT_WRITES_COLLECTION].delete_many(scope).deleted_count
+    db[CHECKPOINT_BLOBS_COLLECTION].delete_many(scope)
+    return deleted_checkpoints, deleted_writes
+
+
+def _checkpoint_time_bucket(checkpoint_id: str, interval: int) -> int:
+    """Checkpoint ids are uuid6, so the creation time is encoded in the id (100ns ticks)."""
+    return UUID(checkpoint_id).time // (interval * 10**7)
+
+
+class CompactingMongoDBSaver(MongoDBSaver):
+    """
+    MongoDBSaver that stores channel values as versioned blobs.
+
+    A checkpoint document only keeps channel versions and metadata; each channel
+    value is written to the blobs collection once per version, so a turn that
+    appends to ``messages`` no longer rewrites files, todos and every other
+    unchanged channel. Loading a checkpoint fetches exactly the blobs named by
+    its ``channel_versions`` in a single query.
+
+    A background compactor keeps the last ``keep_last`` checkpoints per thread
+    and namespace, plus the newest checkpoint of every ``snapshot_interval``
+    window before that, and deletes the rest together with their pending writes
+    and any blob no remaining checkpoint references that is older than
+    ``blob_grace_seconds``.
+
+    A FileMap channel (``files``) is stored as a delta: only the files changed
+    since the version its parent FileMap was stored as, with the list of
+    ancestor versions down to a full copy. FileMap flattens itself every
+    FILE_MAP_MAX_DEPTH updates, which bounds the chain; loading fetches the
+    whole chain in one query and rebuilds the layers.
+
+    Checkpoints written before delta storage carry their values inline and are
+    read unchanged.
+    """
+
+    def __init__(
+        self,
+        client,
+        db_name: str,
+        checkpoint_collection_name: str,
+        writes_collection_name: str,
+        blobs_collection_name: str,
+        keep_last: int = CHECKPOINT_KEEP_LAST,
+        snapshot_interval: int = CHECKPOINT_SNAPSHOT_INTERVAL,
+        compact_interval: float = CHECKPOINT_COMPACT_INTERVAL,
+        blob_grace_seconds: int = CHECKPOINT_BLOB_GRACE_SECONDS,
+        **kwargs,
+    ):
+        super().__init__(
+            client,
+            db_name=db_name,
+            checkpoint_collection_name=checkpoint_collection_name,
+            writes_collection_name=writes_collection_name,
+            **kwargs,
+        )
+        self.blobs_collection = self.db[blobs_collection_name]
+        self.keep_last = max(keep_last, 1)
+        self.snapshot_interval = snapshot_interval
+        self.compact_interval = compact_interval
+        self.blob_grace = timedelta(seconds=blob_grace_seconds)
+        self._dirty_threads = set()
+        self._seeded = set()
+        self._compactor_task = None
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        # MongoDBSaver only creates its indexes on empty collections; make sure they exist
+        indexes = [
+            (self.checkpoint_collection, [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", -1)]),
+            (self.writes_collection, [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", -1), ("task_id", 1), ("idx", 1)]),
+            (self.blobs_collection, [("thread_id", 1), ("checkpoint_ns", 1), ("channel", 1), ("version", 1)]),
+        ]
+        for collection, keys in indexes:
+            try:
+                collection.create_index(keys=keys, unique=True)
+            except OperationFailure as e:
+                # An equivalent index already exists under another name or with other options
+                logger.warning(f"Could not create index on {collection.name}: {e}")
+
+    # ---- Delta storage ----
+
+    def _put_blobs(self, thread_id, checkpoint_ns, channel_values, new_versions):
+        now = datetime.now(timezone.utc)
+        operations = []
+        stored_file_maps = []
+        for channel, version in new_versions.items():
+            value = channel_values.get(channel)
+            fields = {}
+            if channel not in channel_values:
+                type_, blob = "empty", None
+            elif isinstance(value, FileMap):
+                key = (thread_id, checkpoint_ns, channel)
+                if value.stored_version(key) == str(version):
+                    # Re-put of a version that is already stored (first write of a thread in the process)
+                    continue
+                delta = value.delta_since_stored(key)
+                if delta is None:
+                    type_, blob = self.serde.dumps_typed(value)
+                    ancestors = []
+                else:
+                    changes, ancestors = delta
+                    type_, blob = self.serde.dumps_typed(changes)
+                    fields["ancestors"] = ancestors
+                stored_file_maps.append((value, key, str(version), ancestors))
+            else:
+                type_, blob = self.serde.dumps_typed(value)
+            operations.append(
+                UpdateOne(
+                    filter={
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "channel": channel,
+                        "version": str(version),
+                    },
+                    # created_at is refreshed when an existing blob is written again,
+                    # so the compactor's grace period also covers re-referenced blobs
+                    update={"$setOnInsert": {"type": type_, "blob": blob, **fields}, "$max": {"created_at": now}},
+                    upsert=True,
+                )
+            )
+        if operations:
+            self.blobs_collection.bulk_write(operations, ordered=False)
+        for file_map, key, version, ancestors in stored_file_maps:
+            file_map.mark_stored(key, version, ancestors)
+
+    def _load_file_map(self, thread_id, checkpoint_ns, delta_blob):
+        """Rebuild a FileMap from a delta blob and the ancestor blobs it lists."""
+        channel = delta_blob["channel"]
+        ancestors = {
+            blob["version"]: blob
+            for blob in self.blobs_collection.find({
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "channel": channel,
+                "version": {"$in": delta_blob["ancestors"]},
+            })
+        }
+        missing = [version for version in delta_blob["ancestors"] if version not in ancestors]
+        if missing:
+            raise ValueError(f"Missing ancestor versions {missing} of channel {channel} in thread {thread_id}")
+        # Oldest (the full copy) first
+        chain = [ancestors[version] for version in reversed(delta_blob["ancestors"])] + [delta_blob]
+        key = (thread_id, checkpoint_ns, channel)
+        file_map = None
+        for blob in chain:
+            value = self.serde.loads_typed((blob["type"], blob["blob"]))
+            if file_map is None:
+                file_map = value if isinstance(value, FileMap) else FileMap(value)
+            else:
+                file_map = FileMap(value, _parent=file_map)
+            file_map.mark_stored(key, blob["version"], blob.get("ancestors", []))
+        return file_map
+
+    def _load_blobs(self, checkpoint_tuple):
+        if checkpoint_tuple is None:
+            return None
+        checkpoint = checkpoint_tuple.checkpoint
+        # Values stored inline (checkpoints written before delta storage) are used as-is
+        if checkpoint["channel_values"] or not checkpoint["channel_versions"]:
+            return checkpoint_tuple
+
+        configurable = checkpoint_tuple.config["configurable"]
+        blobs = self.blobs_collection.find({
+            "thread_id": configurable["thread_id"],
+            "checkpoint_ns": configurable["checkpoint_ns"],
+            "$or": [
+                {"channel": channel, "version": str(version)}
+                for channel, version in checkpoint["channel_versions"].items()
+            ],
+        })
+        channel_values = {}
+        for blob in blobs:
+            if blob.get("ancestors"):
+                channel_values[blob["channel"]] = self._load_file_map(
+                    configurable["thread_id"], configurable["checkpoint_ns"], blob
+                )
+            elif blob["type"] != "empty":
+                value = self.serde.loads_typed((blob["type"], blob["blob"]))
+                if isinstance(value, FileMap):
+                    # Later versions are stored as deltas against this one
+                    value.mark_stored(
+                        (configurable["thread_id"], configurable["checkpoint_ns"], blob["channel"]), blob["version"], []
+                    )
+                channel_values[blob["channel"]] = value
+        return checkpoint_tuple._replace(checkpoint={**checkpoint, "channel_values": channel_values})
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        if (thread_id, checkpoint_ns) not in self._seeded:
+            # First write for this thread in the process: store every channel once so
+            # threads started before delta storage (values inline) keep their history
+            new_versions = {**checkpoint["channel_versions"], **new_versions}
+        # Blobs go first so a reader never sees a checkpoint whose values are missing
+        self._put_blobs(thread_id, checkpoint_ns, checkpoint["channel_values"], new_versions)
+        self._seeded.add((thread_id, checkpoint_ns))
+        stripped = {**checkpoint, "channel_values": {}}
+        next_config = super().put(config, stripped, metadata, new_versions)
+        self._dirty_threads.add(thread_id)
+        return next_config
+
+    def get_tuple(self, config):
+        return self._load_blobs(super().get_tuple(config))
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        for checkpoint_tuple in super().list(config, filter=filter, before=before, limit=limit):
+            yield self._load_blobs(checkpoint_tuple)
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        self._ensure_compactor()
+        return await super().aput(config, checkpoint, metadata, new_versions)
+
+    def delete_thread(self, thread_id):
+        super().delete_thread(thread_id)
+        self.blobs_collection.delete_many({"thread_id": thread_id})
+        self._dirty_threads.discard(thread_id)
+        self._seeded = {key for key in self._seeded if key[0] != thread_id}
+
+    # ---- Compaction ----
+
+    def _retained_ids(self, checkpoint_ids):
+        """Pick the checkpoints to keep from ids sorted newest first."""
+        retained = set(checkpoint_ids[:self.keep_last])
+        seen_buckets = set()
+        for checkpoint_id in checkpoint_ids[self.keep_last:]:
+            bucket = _checkpoint_time_bucket(checkpoint_id, self.snapshot_interval)
+            if bucket not in seen_buckets:
+                # Newest checkpoint of each window is kept as a snapshot
+                seen_buckets.add(bucket)
+                retained.add(checkpoint_id)
+        return retained
+
+    def compact_thread(self, thread_id: str):
+        """Apply the retention policy to one thread. Returns the number of checkpoints removed."""
+        # A put stores its blobs before its checkpoint, so recent blobs may belong to a
+        # checkpoint that is not stored yet (or was stored after the reference scan)
+        blobs_before = datetime.now(timezone.utc) - self.blob_grace
+        removed = 0
+        for checkpoint_ns in self.checkpoint_collection.distinct("checkpoint_ns", {"thread_id": thread_id}):
+            scope = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+            checkpoint_ids = [
+                doc["checkpoint_id"]
+                for doc in self.checkpoint_collection.find(scope, {"checkpoint_id": 1}, sort=[("checkpoint_id", -1)])
+            ]
+            if len(checkpoint_ids) <= self.keep_last:
+                continue
+
+            retained = self._retained_ids(checkpoint_ids)
+            expired = [checkpoint_id for checkpoint_id in checkpoint_ids if checkpoint_id not in retained]
+            if not expired:
+                continue
+            self.checkpoint_collection.delete_many({**scope, "checkpoint_id": {"$in": expired}})
+            self.writes_collection.delete_many({**scope, "checkpoint_id": {"$in": expired}})
+            removed += len(expired)
+
+            referenced = set()
+            for doc in self.checkpoint_collection.find(scope, {"type": 1, "checkpoint": 1}):
+                checkpoint = self.serde.loads_typed((doc["type"], doc["checkpoint"]))
+                referenced.update(
+                    (channel, str(version)) for channel, version in checkpoint["channel_versions"].items()
+                )
+            # Delta blobs keep the versions they are built on
+            for blob in self.blobs_collection.find({**scope, "ancestors": {"$exists": True}}, {"channel": 1, "version": 1, "ancestors": 1}):
+                if (blob["channel"], blob["version"]) in referenced:
+                    referenced.update((blob["channel"], version) for version in blob["ancestors"])
+            unreferenced = [
+                blob["_id"]
+                for blob in self.blobs_collection.find(
+                    {**scope, "created_at": {"$lt": blobs_before}}, {"channel": 1, "version": 1}
+                )
+                if (blob["channel"], blob["version"]) not in referenced
+            ]
+            if unreferenced:
+                self.blobs_collection.delete_many({"_id": {"$in": unreferenced}})
+        return removed
+
+    def _ensure_compactor(self):
+        if self._compactor_task is None or self._compactor_task.done():
+            self._compactor_task = asyncio.create_task(self._compactor())
+
+    async def _compactor(self):
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            threads = list(self._dirty_threads)
+            self._dirty_threads.difference_update(threads)
+            for thread_id in threads:
+                try:
+                    removed = await asyncio.to_thread(self.compact_thread, thread_id)
+                    if removed:
+                        logger.info(f"Compacted {removed} checkpoints for thread {thread_id}")
+                except Exception as e:
+                    logger.error(f"Checkpoint compaction failed for thread {thread_id}: {e}")
@@ -5,10 +5,13 @@ from langgraph.prebuilt import InjectedState
 from typing import Annotated, List
 from src.States.state import DeepAgentState
 from src.MainAgent.tools.memory_tools import Context
-from src.embedding.embedding import titan_embed_v1
 from src.LLMs.GroqLLMs.llms import groq_gpt_oss_llm
+from src.LLMs.invoke import ainvoke
 from dotenv import load_dotenv
 from langchain_community.vectorstores import FAISS
+from src.vectorstore.index_cache import faiss_cache, file_chunk_ids
+from src.vectorstore.retrieval import RETRIEVAL_K_PER_FILE, search_thread
+from src.summarization.summarizer import summarize_file_chunks
 from Backend.api.database import sessionLocal
 from Backend.api import models
 load_dotenv("/app/.env")
@@ -171,35 +174,25 @@ async def search_retrieve_faiss(
     if not all_file_ids:
         return "No documents have been added to this conversation yet. Please add documents first."
 
-    db = FAISS.load_local(
-        f"faiss/{thread_id}",
-        titan_embed_v1,
-        allow_dangerous_deserialization=True
-    )
-
-    # Search with higher k to ensure we get relevant chunks
-    docs = db.similarity_search(question, k=15)
-    
-    # Filter by file_id(s)
+    # Search is restricted to the requested files' chunks before ranking
     if file_id:
         # Search only in specific file
-        filtered_docs = [
-            d for d in docs 
-            if d.metadata.get("file_id") == file_id
-        ]
+        results = await search_thread(thread_id, question, [file_id])
         context_msg = f"file ID: {file_id}"
+        context = "\n\n".join(doc.page_content for doc, _ in results)
     else:
-        # Search across all added files
-        filtered_docs = [
-            d for d in docs 
-            if d.metadata.get("file_id") in all_file_ids
-        ]
+        # Top chunks of every added file, so one file can't crowd out the others
+        results_by_file = await search_thread(thread_id, question, all_file_ids, k=RETRIEVAL_K_PER_FILE, per_file=True)
+        results = [r for file_results in results_by_file.values() for r in file_results]
         context_msg = f"all {len(all_file_ids)} added file(s)"
+        context = "\n\n".join(
+            f"[File: {fid}]\n" + "\n\n".join(doc.page_content for doc, _ in file_results)
+            for fid, file_results in results_by_file.items()
+            if file_results
+        )
     
-    if not filtered_docs:
+    if not results:
         return f"No relevant information found in {context_msg} for this question."
-        
-    context = "\n\n".join(d.page_content for d in filtered_docs[:5])  # Use top 5 most relevant
 
     prompt = f"""
 Use ONLY the context below to answer the question.
@@ -213,22 +206,15 @@ Question:
 
 Answer:"""
 
-    return groq_gpt_oss_llm.invoke(prompt).content
+    return (await ainvoke(groq_gpt_oss_llm, prompt)).content
 
 
 
 def get_all_chunks(db: FAISS, file_id: str):
-    """Retrieve all document chunks for a given file ID from the FAISS vector store."""
-    # Get all documents from the vector store
-    all_docs = db.docstore._dict.values()
-    
-    # Filter by file_id in metadata
-    file_docs = [
-        doc for doc in all_docs 
-        if doc.metadata.get("file_id") == file_id
-    ]
-    
-    return file_docs
+    """Retrieve all document chunks for a given file ID, in page order, via the chunk id side index."""
+    file_docs = [db.docstore.search(chunk_id) for chunk_id in file_chunk_ids(db, file_id)]
+    # Chunk ids are written in page order; the sort only guards older indexes
+    return sorted(file_docs, key=lambda doc: doc.metadata.get("page", 0))
 
 
 @tool
@@ -249,30 +235,11 @@ async def summarize_file(
 
 
 
-    db = FAISS.load_local(
-        f"faiss/{thread_id}",
-        titan_embed_v1,
-        allow_dangerous_deserialization=True
-    )
+    db = await faiss_cache.get(thread_id)
 
     docs = get_all_chunks(db, file_id)
 
     if not docs:
         return "No content found for this file."
 
-    # ---- MAP ----
-    partial = []
-    for doc in docs:
-        partial.append(
-            groq_gpt_oss_llm.invoke(
-                f"Summarize this text:\n{doc.page_content}"
-            ).content
-        )
-
-    # ---- REDUCE ----
-    final = groq_gpt_oss_llm.invoke(
-        "Combine these summaries into one coherent summary:\n"
-        + "\n".join(partial)
-    ).content
-
-    return final
+    return await summarize_file_chunks(docs, file_id, groq_gpt_oss_llm)
@@ -382,6 +382,17 @@ TASK_DESCRIPTION_PREFIX = """Delegate a task to a specialized sub-agent with iso
 {other_agents}
 """
 
+BATCH_TASK_DESCRIPTION_PREFIX = """Delegate several INDEPENDENT tasks to specialized sub-agents in one call. The tasks run concurrently, each with its own isolated context, and the results come back together in the order given.
+Use this instead of multiple `task` calls when no task needs the output of another (e.g. query the database AND search the web).
+Each item needs a `subagent_type` and a `description`. Available agents for delegation are:
+{other_agents}
+"""
+
+PARALLEL_DELEGATION_INSTRUCTIONS = """## Parallel delegation
+When a request needs several sub-agent tasks that do NOT depend on each other's results, delegate them together with a single `task_batch` call instead of calling `task` once per step.
+Keep using `task` for a single delegation, or when a step needs the output of a previous one (e.g. create a PDF, THEN email it).
+"""
+
 SUBAGENT_USAGE_INSTRUCTIONS = """You can delegate tasks to sub-agents.
 
 <Task>
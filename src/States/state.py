@@ -1,3 +1,5 @@
+import os
+from collections.abc import Mapping
 from typing import Annotated, Literal, NotRequired
 from typing_extensions import TypedDict
 
@@ -16,25 +18,146 @@ class Todo(TypedDict):
     status: Literal["pending", "in_progress", "completed"]
 
 
+# Number of update layers a FileMap may stack before it is flattened again
+FILE_MAP_MAX_DEPTH = int(os.getenv("FILE_MAP_MAX_DEPTH", "16"))
+
+
+class FileMap(Mapping):
+    """Immutable virtual file system mapping with structural sharing.
+
+    An update does not copy the existing files: it creates a new layer holding
+    only the changed files on top of the previous FileMap. Merging is therefore
+    O(changed files), and older versions (still referenced by earlier
+    checkpoints) remain valid. Once the layer chain is deeper than
+    FILE_MAP_MAX_DEPTH it is flattened, which bounds lookup cost and amortizes
+    the flattening to O(files / FILE_MAP_MAX_DEPTH) per update.
+
+    A checkpointer that stores a FileMap records where with ``mark_stored``;
+    ``delta_since_stored`` then gives the files changed since the nearest stored
+    ancestor, so a checkpoint can store only those (see CompactingMongoDBSaver).
+    """
+
+    __slots__ = ("_parent", "_changes", "_depth", "_len", "_stored")
+
+    def __init__(self, files=None, *, _parent=None):
+        changes = dict(files or {})
+        if _parent is not None and _parent._depth >= FILE_MAP_MAX_DEPTH:
+            changes = {**_parent._flatten(), **changes}
+            _parent = None
+
+        self._parent = _parent
+        self._changes = changes
+        self._stored = None
+        if _parent is None:
+            self._depth = 0
+            self._len = len(changes)
+        else:
+            self._depth = _parent._depth + 1
+            self._len = len(_parent) + sum(1 for name in changes if name not in _parent)
+
+    def __getitem__(self, name):
+        node = self
+        while node is not None:
+            if name in node._changes:
+                return node._changes[name]
+            node = node._parent
+        raise KeyError(name)
+
+    def __iter__(self):
+        seen = set()
+        node = self
+        while node is not None:
+            for name in node._changes:
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+            node = node._parent
+
+    def __len__(self):
+        return self._len
+
+    def __repr__(self):
+        return f"FileMap({self._flatten()!r})"
+
+    def _flatten(self) -> dict:
+        layers = []
+        node = self
+        while node is not None:
+            layers.append(node._changes)
+            node = node._parent
+        flat = {}
+        for layer in reversed(layers):
+            flat.update(layer)
+        return flat
+
+    def updated(self, changes) -> "FileMap":
+        """Return a new FileMap with the given files added or replaced."""
+        if not changes:
+            return self
+        if not self._len:
+            return FileMap(changes)
+        return FileMap(changes, _parent=self)
+
+    def mark_stored(self, key, version: str, ancestors: list[str]):
+        """Record that this version was stored under ``key`` as ``version``, on top of ``ancestors`` (nearest first)."""
+        self._stored = (key, version, ancestors)
+
+    def stored_version(self, key) -> str | None:
+        """The version this FileMap was stored as under ``key``, if any."""
+        if self._stored is not None and self._stored[0] == key:
+            return self._stored[1]
+        return None
+
+    def delta_since_stored(self, key):
+        """
+        (changed files, ancestor versions) relative to the nearest ancestor stored
+        under ``key``, or None if no ancestor was stored there.
+        """
+        layers = []
+        node = self
+        while node is not None:
+            if node is not self and node._stored is not None and node._stored[0] == key:
+                _, version, ancestors = node._stored
+                changes = {}
+                for layer in reversed(layers):
+                    changes.update(layer)
+                return changes, [version, *ancestors]
+            layers.append(node._changes)
+            node = node._parent
+        return None
+
+    def model_dump(self) -> dict:
+        """Flat form used by the checkpoint serializer (the same hook it uses for pydantic models)."""
+        return {"files": self._flatten()}
+
+    def __reduce__(self):
+        return (FileMap, (self._flatten(),))
+
+
 def file_reducer(left, right):
-    """Merge two file dictionaries, with right side taking precedence.
+    """Merge two file mappings, with right side taking precedence.
 
     Used as a reducer function for the files field in agent state,
-    allowing incremental updates to the virtual file system.
+    allowing incremental updates to the virtual file system. The result
+    is a FileMap that shares the unchanged files with the left side
+    instead of copying them.
 
     Args:
-        left: Left side dictionary (existing files)
-        right: Right side dictionary (new/updated files)
+        left: Left side mapping (existing files)
+        right: Right side mapping (new/updated files)
 
     Returns:
-        Merged dictionary with right values overriding left values
+        FileMap with right values overriding left values
     """
     if left is None:
-        return right
+        return right if right is None or isinstance(right, FileMap) else FileMap(right)
     elif right is None:
         return left
     else:
-        return {**left, **right}
+        if not isinstance(left, FileMap):
+            # Plain dicts come from the channel's initial value or older checkpoints
+            left = FileMap(left)
+        return left.updated(right)
 
 
 class DeepAgentState(AgentState):
@@ -42,10 +165,10 @@ class DeepAgentState(AgentState):
 
     Inherits from LangGraph's AgentState and adds:
     - todos: List of Todo items for task planning and progress tracking
-    - files: Virtual file system stored as dict mapping filenames to content
+    - files: Virtual file system mapping filenames to content (a FileMap once updated)
     - thread_id: Conversation thread identifier for multi-turn conversations
     """
 
     todos: NotRequired[list[Todo]]
-    files: Annotated[NotRequired[dict[str, str]], file_reducer]
+    files: Annotated[NotRequired[Mapping[str, str]], file_reducer]
     thread_id: NotRequired[str]  # To track conversation threads
\ No newline at end of file
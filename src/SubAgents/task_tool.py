@@ -1,3 +1,5 @@
+import os
+import asyncio
 from typing import Annotated, NotRequired
 from typing_extensions import TypedDict
 
@@ -7,7 +9,8 @@ from langgraph.prebuilt import InjectedState  # updated 1.0
 from langchain.agents import create_agent  # updated 1.0
 from langgraph.types import Command
 
-from src.Prompts.prompts import TASK_DESCRIPTION_PREFIX
+from src.Prompts import prompts
+from src.logging.logger import logger
 from src.States.state import DeepAgentState
 
 class SubAgent(TypedDict):
@@ -19,8 +22,50 @@ class SubAgent(TypedDict):
     tools: NotRequired[list[str]]
 
 
-def _create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
-    """Create a task delegation tool that enables context isolation through sub-agents.
+class DelegatedTask(TypedDict):
+    """One entry of a batched delegation."""
+
+    subagent_type: str
+    description: str
+
+
+# Maximum number of sub-agents running at the same time for batched delegation
+SUBAGENT_MAX_CONCURRENCY = int(os.getenv("SUBAGENT_MAX_CONCURRENCY", "4"))
+
+
+def _project_subagent_state(state: DeepAgentState, description: str) -> dict:
+    """Build the minimal state a sub-agent runs on.
+
+    The sub-agent only gets its task description, the thread id and the files
+    the description mentions by name. The projected files dict is new, but it
+    shares the parent's file contents instead of copying them; the parent state
+    itself is never modified (writes go through the files reducer, which builds
+    new dicts), so concurrent delegations can share it safely.
+
+    A plain dict is used rather than a read-only mapping proxy because the
+    sub-agent inherits the parent's checkpointer and its input must be serializable.
+    """
+    files = state.get("files") or {}
+    referenced = {name: content for name, content in files.items() if name in description}
+    return {
+        "messages": [{"role": "user", "content": description}],
+        "thread_id": state.get("thread_id", "1111"),
+        "files": referenced,
+    }
+
+
+def _changed_files(sub_state: dict, result: dict) -> dict:
+    """Return only the files a sub-agent created or modified."""
+    before = sub_state["files"]
+    return {
+        name: content
+        for name, content in (result.get("files") or {}).items()
+        if before.get(name) != content
+    }
+
+
+def _create_task_tools(tools, subagents: list[SubAgent], model, state_schema, max_concurrency: int = SUBAGENT_MAX_CONCURRENCY):
+    """Create the task delegation tools that enable context isolation through sub-agents.
 
     This function implements the core pattern for spawning specialized sub-agents with
     isolated contexts, preventing context clash and confusion in complex multi-step tasks.
@@ -30,9 +75,11 @@ def _create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
         subagents: List of specialized sub-agent configurations
         model: The language model to use for all agents
         state_schema: The state schema (typically DeepAgentState)
+        max_concurrency: Maximum number of sub-agents a batched delegation runs at once
 
     Returns:
-        A 'task' tool that can delegate work to specialized sub-agents
+        A 'task' tool that delegates one task and a 'task_batch' tool that fans
+        independent tasks out to several sub-agents concurrently
     """
     # Create agent registry
     agents = {}
@@ -69,7 +116,29 @@ def _create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
 
 
 
-    @tool(description=TASK_DESCRIPTION_PREFIX.format(other_agents=other_agents_string))
+    async def _run_subagent(subagent_type: str, description: str, state: DeepAgentState):
+        """Run one sub-agent on a fresh context containing only the task description."""
+        sub_agent = agents[subagent_type]
+
+        thread_id = state.get("thread_id" , "1111")  
+
+        description += f"\n\nConversation Thread ID: {thread_id}"
+        logger.debug(f"Delegating to sub-agent {subagent_type} on thread {thread_id}")
+
+        # Create isolated context with only the task description
+        # This is the key to context isolation - no parent history, no unrelated files.
+        sub_state = _project_subagent_state(state, description)
+
+        # Execute the sub-agent in isolation (async for MCP tools)
+        result = await sub_agent.ainvoke(sub_state)
+        # Only hand back file changes, not the files we passed in
+        result["files"] = _changed_files(sub_state, result)
+        return result
+
+    def _invalid_agent_error(subagent_type: str):
+        return f"Error: invoked agent of type {subagent_type}, the only allowed types are {[f'`{k}`' for k in agents]}"
+
+    @tool(description=prompts.TASK_DESCRIPTION_PREFIX.format(other_agents=other_agents_string))
     async def task(
         description: str,
         subagent_type: str,
@@ -83,25 +152,9 @@ def _create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
         """
         # Validate requested agent type exists
         if subagent_type not in agents:
-            return f"Error: invoked agent of type {subagent_type}, the only allowed types are {[f'`{k}`' for k in agents]}"
+            return _invalid_agent_error(subagent_type)
 
-        # Get the requested sub-agent
-        sub_agent = agents[subagent_type]
-
-
-        thread_id = state.get("thread_id" , "1111")  
-
-        description += f"\n\nConversation Thread ID: {thread_id}"
-        print("Delegating to sub-agent:", subagent_type, "with thread ID:", thread_id , "the description is :" , description)
-
-        # Create isolated context with only the task description
-        # This is the key to context isolation - no parent history
-        state["messages"] = [{"role": "user", "content": description}]
-
-        print("discription sent to sub-agent:", description)
-
-        # Execute the sub-agent in isolation (async for MCP tools)
-        result = await sub_agent.ainvoke(state)
+        result = await _run_subagent(subagent_type, description, state)
         #print("Sub-agent result:", result)
 
         # Return results to parent agent via Command state update
@@ -117,4 +170,65 @@ def _create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
             }
         )
 
-    return task
\ No newline at end of file
+    # Shared by every batched call so the limit holds across the whole process
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    @tool(description=prompts.BATCH_TASK_DESCRIPTION_PREFIX.format(other_agents=other_agents_string))
+    async def task_batch(
+        tasks: list[DelegatedTask],
+        state: Annotated[DeepAgentState, InjectedState],
+        tool_call_id: Annotated[str, InjectedToolCallId],
+    ):
+        """Delegate independent tasks to several sub-agents and run them concurrently.
+
+        Results are merged in the order the tasks were given, not the order they
+        finish, so the parent state update is deterministic. A file written with
+        different contents by several tasks keeps the first task's version; the
+        later tasks' sections say their version was not applied.
+        """
+        if not tasks:
+            return "Error: task_batch needs at least one task."
+        for item in tasks:
+            if item["subagent_type"] not in agents:
+                return _invalid_agent_error(item["subagent_type"])
+
+        async def run_one(item: DelegatedTask):
+            async with semaphore:
+                try:
+                    return await _run_subagent(item["subagent_type"], item["description"], state)
+                except Exception as e:
+                    # One failing sub-agent shouldn't discard the others' results
+                    return e
+
+        results = await asyncio.gather(*(run_one(item) for item in tasks))
+
+        files = {}
+        written_by = {}
+        sections = []
+        for index, (item, result) in enumerate(zip(tasks, results), 1):
+            header = f"[{index}] {item['subagent_type']}"
+            if isinstance(result, Exception):
+                sections.append(f"{header} failed: {result}")
+                continue
+            conflicts = []
+            for name, content in (result.get("files") or {}).items():
+                if name in files and files[name] != content:
+                    conflicts.append(f"{name} (kept the version from task [{written_by[name]}])")
+                    continue
+                files[name] = content
+                written_by.setdefault(name, index)
+            section = f"{header}:\n{result['messages'][-1].content}"
+            if conflicts:
+                section += "\n\nNot applied, another task in this batch wrote different contents: " + ", ".join(conflicts)
+            sections.append(section)
+
+        return Command(
+            update={
+                "files": files,
+                "messages": [
+                    ToolMessage("\n\n".join(sections), tool_call_id=tool_call_id)
+                ],
+            }
+        )
+
+    return [task, task_batch]
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+from langgraph.store.mongodb import MongoDBStore
+from src.database.mongo import mongo_manager
+from src.database.profile_cache import get_cached_profile
+from src.logging.logger import logger
+
+
+USERS_NAMESPACE = ("users",)
+PROTOCOLS_NAMESPACE = ("protocols",)
+
+
+# Lazy initialization: building a MongoDBStore lists the collection's indexes,
+# so the user profile store is created once per process and reused.
+_user_store = None
+_user_store_lock = threading.Lock()
+
+
+def get_user_store() -> MongoDBStore:
+    """Process-wide store holding user profiles (Synapse_admins_info)."""
+    global _user_store
+    if _user_store is None:
+        with _user_store_lock:
+            if _user_store is None:
+                _user_store = MongoDBStore(
+                    collection=mongo_manager.db("Synapse_admins_info")["synapse_agent_store"]
+                )
+    return _user_store
+
+
+async def aget_user_store() -> MongoDBStore:
+    if _user_store is not None:
+        return _user_store
+    return await asyncio.to_thread(get_user_store)
+
+
+async def _load_user_info(user_name: str) -> dict | None:
+    store = await aget_user_store()
+    item = await store.aget(USERS_NAMESPACE, user_name)
+    return item.value if item else None
+
+
+async def aget_user_info(user_name: str) -> dict | None:
+    """Return the stored profile for a user (cached), or None if there is none."""
+    return await get_cached_profile(user_name, _load_user_info)
+
+
+async def asave_protocol(store, sequence_id: str, sequence_data: dict):
+    """Save a sequence protocol to the agent's long-term store (embedded for semantic search)."""
+    await store.aput(PROTOCOLS_NAMESPACE, sequence_id, sequence_data)
+
+
+async def asearch_protocols(store, query: str, limit: int = 5):
+    """Semantic search over saved protocols, falling back to a plain listing if vector search fails."""
+    try:
+        return await store.asearch(PROTOCOLS_NAMESPACE, query=query, limit=limit)
+    except Exception as e:
+        logger.warning(f"Semantic search failed, listing protocols instead: {e}")
+        return await store.asearch(PROTOCOLS_NAMESPACE, limit=limit)
@@ -0,0 +1,147 @@
+import os
+import threading
+from collections import defaultdict
+
+from pymongo import AsyncMongoClient, MongoClient, monitoring
+
+
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+MONGO_APP_NAME = os.getenv("MONGO_APP_NAME", "synapse")
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters per server address, fed by pymongo's CMAP events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pools = defaultdict(lambda: {
+            "open": 0,
+            "checked_out": 0,
+            "created": 0,
+            "closed": 0,
+            "checkout_failures": 0,
+            "cleared": 0,
+        })
+
+    def _bump(self, address, key, delta=1):
+        with self._lock:
+            self.pools[f"{address[0]}:{address[1]}"][key] += delta
+
+    def pool_created(self, event):
+        self._bump(event.address, "open", 0)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._bump(event.address, "cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._bump(event.address, "created")
+        self._bump(event.address, "open")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._bump(event.address, "closed")
+        self._bump(event.address, "open", -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._bump(event.address, "checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._bump(event.address, "checked_out")
+
+    def connection_checked_in(self, event):
+        self._bump(event.address, "checked_out", -1)
+
+    def snapshot(self):
+        with self._lock:
+            return {address: dict(counters) for address, counters in self.pools.items()}
+
+
+class MongoConnectionManager:
+    """
+    One Mongo connection pool per process.
+
+    Both clients are created on first use and shared by every caller, instead
+    of each module holding its own ``MongoClient`` and pool. ``client`` is the
+    pymongo sync client (agent checkpointer, store, routers); ``async_client``
+    is pymongo's native asyncio client for code running on the event loop.
+    """
+
+    def __init__(self, uri: str | None = None):
+        self._uri = uri
+        self._lock = threading.Lock()
+        self._client = None
+        self._async_client = None
+        self.sync_metrics = PoolMetrics()
+        self.async_metrics = PoolMetrics()
+
+    @property
+    def uri(self):
+        # Read lazily: the .env file is loaded by whichever entry point runs first.
+        # mongo_url is what the auth module's client used to read; keep honouring it.
+        return self._uri or os.getenv("MONGODB_URI") or os.getenv("mongo_url")
+
+    def _client_options(self, metrics: PoolMetrics):
+        return {
+            "maxPoolSize": MONGO_MAX_POOL_SIZE,
+            "minPoolSize": MONGO_MIN_POOL_SIZE,
+            "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+            "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+            "appname": MONGO_APP_NAME,
+            "event_listeners": [metrics],
+        }
+
+    @property
+    def client(self) -> MongoClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = MongoClient(self.uri, **self._client_options(self.sync_metrics))
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncMongoClient:
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = AsyncMongoClient(self.uri, **self._client_options(self.async_metrics))
+        return self._async_client
+
+    def db(self, name: str):
+        return self.client[name]
+
+    def async_db(self, name: str):
+        return self.async_client[name]
+
+    def stats(self):
+        """Pool sizes and counters for the clients created so far."""
+        return {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "sync": self.sync_metrics.snapshot() if self._client is not None else None,
+            "async": self.async_metrics.snapshot() if self._async_client is not None else None,
+        }
+
+    async def close(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+mongo_manager = MongoConnectionManager()
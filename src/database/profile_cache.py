@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+import redis.asyncio as aioredis
+from src.logging.logger import logger
+
+
+USER_PROFILE_CACHE_TTL = float(os.getenv("USER_PROFILE_CACHE_TTL", "300"))
+USER_PROFILE_CACHE_SIZE = int(os.getenv("USER_PROFILE_CACHE_SIZE", "1024"))
+# Optional shared layer: profiles cached in Redis and invalidations fanned out to every process
+USER_PROFILE_CACHE_REDIS = os.getenv("USER_PROFILE_CACHE_REDIS", "true").lower() == "true"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+USER_PROFILE_CACHE_REDIS_CONNECT_TIMEOUT = float(os.getenv("USER_PROFILE_CACHE_REDIS_CONNECT_TIMEOUT", "2"))
+PROFILE_INVALIDATION_CHANNEL = "user_profile:invalidate"
+
+
+def profile_key(user_name: str) -> str:
+    return f"user_profile:{user_name}"
+
+
+def profile_generation_key(user_name: str) -> str:
+    return f"user_profile_gen:{user_name}"
+
+
+class ProfileCache:
+    """
+    In-process TTL + LRU cache of user profiles keyed by user name.
+
+    Every invalidation bumps the user's generation. A loader captures the
+    generation before reading the store and passes it to ``set``, so a profile
+    read before an invalidation is not cached after it.
+    """
+
+    def __init__(self, ttl: float = USER_PROFILE_CACHE_TTL, max_size: int = USER_PROFILE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def generation(self, user_name: str) -> int:
+        with self._lock:
+            return self._generations.get(user_name, 0)
+
+    def get(self, user_name: str):
+        """Return the cached profile, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(user_name)
+            if entry is None:
+                return None
+            expires_at, profile = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_name]
+                return None
+            self._entries.move_to_end(user_name)
+            return profile
+
+    def set(self, user_name: str, profile: dict, generation: int | None = None):
+        with self._lock:
+            if generation is not None and generation != self._generations.get(user_name, 0):
+                return
+            self._entries[user_name] = (time.monotonic() + self.ttl, profile)
+            self._entries.move_to_end(user_name)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_name: str):
+        with self._lock:
+            self._entries.pop(user_name, None)
+            self._generations[user_name] = self._generations.get(user_name, 0) + 1
+
+
+profile_cache = ProfileCache()
+
+_redis_client = None
+_subscriber_task = None
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        # Connect timeout only: the invalidation listener blocks on reads by design
+        _redis_client = aioredis.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=USER_PROFILE_CACHE_REDIS_CONNECT_TIMEOUT,
+        )
+    return _redis_client
+
+
+async def _listen_for_invalidations():
+    """Evict profiles invalidated by any process (auth router writes)."""
+    while True:
+        pubsub = _get_redis().pubsub()
+        try:
+            await pubsub.subscribe(PROFILE_INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    profile_cache.invalidate(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"User profile invalidation listener failed, retrying: {e}")
+            await asyncio.sleep(5)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+def _ensure_subscriber():
+    global _subscriber_task
+    if USER_PROFILE_CACHE_REDIS and (_subscriber_task is None or _subscriber_task.done()):
+        _subscriber_task = asyncio.create_task(_listen_for_invalidations())
+
+
+async def get_cached_profile(user_name: str, loader):
+    """
+    Return a user profile from the in-process cache, then Redis, then ``loader``.
+
+    ``loader`` is an async callable returning the profile dict or None; misses
+    are not cached so a profile saved later is picked up immediately.
+
+    Redis entries carry the user's generation (bumped by every invalidation)
+    from when their loader started. An entry written back by a loader that read
+    the store before an invalidation has an old generation and is ignored.
+    """
+    _ensure_subscriber()
+    profile = profile_cache.get(user_name)
+    if profile is not None:
+        return profile
+    local_generation = profile_cache.generation(user_name)
+
+    redis_generation = None
+    if USER_PROFILE_CACHE_REDIS:
+        try:
+            generation, cached = await _get_redis().mget(profile_generation_key(user_name), profile_key(user_name))
+            redis_generation = int(generation or 0)
+            if cached is not None:
+                entry = json.loads(cached)
+                if entry.get("generation") == redis_generation:
+                    profile_cache.set(user_name, entry["profile"], local_generation)
+                    return entry["profile"]
+        except Exception as e:
+            logger.warning(f"Redis profile cache read failed for {user_name}: {e}")
+
+    profile = await loader(user_name)
+    if profile is None:
+        return None
+    profile_cache.set(user_name, profile, local_generation)
+    if redis_generation is not None:
+        try:
+            await _get_redis().set(
+                profile_key(user_name),
+                json.dumps({"generation": redis_generation, "profile": profile}, default=str),
+                ex=int(USER_PROFILE_CACHE_TTL),
+            )
+        except Exception as e:
+            logger.warning(f"Redis profile cache write failed for {user_name}: {e}")
+    return profile
+
+
+async def invalidate_user_profile(user_name: str):
+    """Drop a user's cached profile here and, through Redis pub/sub, in every other process."""
+    profile_cache.invalidate(user_name)
+    if not USER_PROFILE_CACHE_REDIS:
+        return
+    try:
+        async with _get_redis().pipeline(transaction=True) as pipe:
+            pipe.incr(profile_generation_key(user_name))
+            pipe.delete(profile_key(user_name))
+            pipe.publish(PROFILE_INVALIDATION_CHANNEL, user_name)
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to publish profile invalidation for {user_name}: {e}")
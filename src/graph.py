@@ -7,7 +7,7 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
 
-from src.MainAgent.agent import MainAgent
+from src.MainAgent.agent import get_main_agent
 from src.States.state import DeepAgentState, Todo
 
 
@@ -16,17 +16,10 @@ class GraphState(DeepAgentState):
     pass
 
 
-async def create_agent_node():
-    """Create the main agent."""
-    main_agent_instance = MainAgent()
-    agent = await main_agent_instance.create_main_agent()
-    return agent
-
-
 async def agent_node(state: GraphState):
     """Main agent node that processes user input."""
-    # Get the agent
-    agent = await create_agent_node()
+    # Reuse the process-wide compiled agent (rebuilt only when prompts/configs change)
+    agent = await get_main_agent()
     
     # Use the full state (including todos and files)
     response = await agent.ainvoke(state)
@@ -0,0 +1,129 @@
+import os
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+
+from src.database.mongo import mongo_manager
+from src.LLMs.invoke import ainvoke
+from src.logging.logger import logger
+
+
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+# Input token budgets per LLM call for the map and reduce steps
+SUMMARY_MAP_TOKENS = int(os.getenv("SUMMARY_MAP_TOKENS", "3000"))
+SUMMARY_REDUCE_TOKENS = int(os.getenv("SUMMARY_REDUCE_TOKENS", "6000"))
+SUMMARY_CACHE_COLLECTION = "file_summaries"
+
+MAP_PROMPT = "Summarize this text:\n{text}"
+REDUCE_PROMPT = "Combine these summaries into one coherent summary:\n{text}"
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting
+    return len(text) // 4 + 1
+
+
+def content_hash(texts: list[str]) -> str:
+    """Hash of a file's chunk texts in order; identical content gets the same summary."""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def model_name(llm) -> str:
+    """Provider class and model id of a chat model, e.g. ``ChatGroq:llama-3.3-70b-versatile``."""
+    name = getattr(llm, "model_name", None) or getattr(llm, "model_id", None) or getattr(llm, "model", None)
+    return f"{type(llm).__name__}:{name}"
+
+
+# Changes to the prompts or packing budgets change the summaries, so they are part of the cache key
+PROMPT_VERSION = hashlib.sha256(
+    "\x00".join([MAP_PROMPT, REDUCE_PROMPT, str(SUMMARY_MAP_TOKENS), str(SUMMARY_REDUCE_TOKENS)]).encode("utf-8")
+).hexdigest()[:16]
+
+
+def summary_cache_key(texts: list[str], llm) -> str:
+    """Cache key of a summary: the content, the model that wrote it and the prompt version."""
+    return f"{content_hash(texts)}:{model_name(llm)}:{PROMPT_VERSION}"
+
+
+def pack(texts: list[str], budget: int) -> list[list[str]]:
+    """Group consecutive texts so each group stays within the token budget."""
+    groups, current, used = [], [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and used + tokens > budget:
+            groups.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _cache_collection():
+    return mongo_manager.async_db("Synapse_memory_db")[SUMMARY_CACHE_COLLECTION]
+
+
+async def get_cached_summary(key: str) -> str | None:
+    try:
+        doc = await _cache_collection().find_one({"_id": key})
+        return doc["summary"] if doc else None
+    except Exception as e:
+        logger.warning(f"Summary cache read failed: {e}")
+        return None
+
+
+async def save_summary(key: str, summary: str, file_id: str):
+    try:
+        await _cache_collection().update_one(
+            {"_id": key},
+            {"$set": {"summary": summary, "file_id": file_id, "created_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.warning(f"Summary cache write failed: {e}")
+
+
+async def summarize_texts(texts: list[str], llm, max_concurrency: int = SUMMARY_MAX_CONCURRENCY) -> str:
+    """
+    Map-reduce summary of ordered texts.
+
+    Chunks are packed into map calls of up to SUMMARY_MAP_TOKENS, run
+    concurrently under a semaphore, and the partial summaries are reduced in a
+    tree: each level combines groups that fit SUMMARY_REDUCE_TOKENS until one
+    summary is left, so no prompt outgrows the context window.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def call(prompt: str, group: list[str]) -> str:
+        async with semaphore:
+            response = await ainvoke(llm, prompt.format(text="\n\n".join(group)))
+            return response.content
+
+    summaries = await asyncio.gather(*(call(MAP_PROMPT, group) for group in pack(texts, SUMMARY_MAP_TOKENS)))
+
+    while len(summaries) > 1:
+        groups = pack(summaries, SUMMARY_REDUCE_TOKENS)
+        if len(groups) == len(summaries):
+            # Every summary fills the budget alone: pair them so the tree still shrinks
+            groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+        summaries = await asyncio.gather(*(call(REDUCE_PROMPT, group) for group in groups))
+
+    return summaries[0]
+
+
+async def summarize_file_chunks(docs, file_id: str, llm) -> str:
+    """Summarize a file's chunks (in page order), reusing the cached summary of identical content by the same model and prompts."""
+    texts = [doc.page_content for doc in docs]
+    key = summary_cache_key(texts, llm)
+    cached = await get_cached_summary(key)
+    if cached is not None:
+        return cached
+
+    summary = await summarize_texts(texts, llm)
+    await save_summary(key, summary, file_id)
+    return summary
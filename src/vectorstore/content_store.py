@@ -0,0 +1,152 @@
+import os
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+from src.database.mongo import mongo_manager
+from src.logging.logger import logger
+from src.vectorstore.embedders import get_embedder
+
+
+# Content-addressed ingestion cache, scoped per admin:
+#   file_manifests: hash of the uploaded bytes -> the file's chunks (text + page), in size-bounded parts
+#   chunk_embeddings: hash of a normalized chunk -> its vector for one embedding model
+CONTENT_STORE_DB = "Synapse_memory_db"
+CONTENT_STORE_TTL_DAYS = int(os.getenv("CONTENT_STORE_TTL_DAYS", "30"))
+# Chunks per manifest document are capped by size, well under Mongo's 16 MB document limit
+MANIFEST_PART_BYTES = int(os.getenv("MANIFEST_PART_BYTES", str(4 * 1024 * 1024)))
+
+_indexes_ready = False
+_indexes_lock = threading.Lock()
+
+
+def _collection(name: str):
+    global _indexes_ready
+    db = mongo_manager.db(CONTENT_STORE_DB)
+    if not _indexes_ready:
+        with _indexes_lock:
+            if not _indexes_ready:
+                for collection in ("file_manifests", "chunk_embeddings"):
+                    try:
+                        db[collection].create_index("created_at", expireAfterSeconds=CONTENT_STORE_TTL_DAYS * 86400)
+                    except OperationFailure as e:
+                        logger.warning(f"Could not create TTL index on {collection}: {e}")
+                db["file_manifests"].create_index([("manifest", 1), ("part", 1)])
+                _indexes_ready = True
+    return db[name]
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_hash(text: str) -> str:
+    # Whitespace-normalized, so re-extracted text with different spacing still matches
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _key(admin_id, model_name: str, content_hash: str) -> str:
+    return f"{admin_id}:{model_name}:{content_hash}"
+
+
+def _manifest_parts(chunks: list[dict]) -> list[list[dict]]:
+    """Split chunks into consecutive parts of at most MANIFEST_PART_BYTES of text."""
+    parts, current, size = [], [], 0
+    for chunk in chunks:
+        chunk_size = len(chunk["text"].encode("utf-8")) + 64
+        if current and size + chunk_size > MANIFEST_PART_BYTES:
+            parts.append(current)
+            current, size = [], 0
+        current.append(chunk)
+        size += chunk_size
+    parts.append(current)
+    return parts
+
+
+def get_file_manifest(admin_id, model_name: str, content_hash: str) -> list[dict] | None:
+    """Chunks ({"text", "page"}) of a file this admin already ingested, or None."""
+    key = _key(admin_id, model_name, content_hash)
+    try:
+        docs = list(_collection("file_manifests").find({"manifest": key}, sort=[("part", 1)]))
+    except Exception as e:
+        logger.warning(f"File manifest lookup failed: {e}")
+        return None
+    # A manifest only counts once every part is there (parts expire or get written independently)
+    if not docs or len(docs) != docs[0]["parts"] or [doc["part"] for doc in docs] != list(range(len(docs))):
+        return None
+    return [chunk for doc in docs for chunk in doc["chunks"]]
+
+
+def save_file_manifest(admin_id, model_name: str, content_hash: str, chunks: list[dict]):
+    """Store a file's chunks as one document per MANIFEST_PART_BYTES part."""
+    key = _key(admin_id, model_name, content_hash)
+    parts = _manifest_parts(chunks)
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"_id": f"{key}:{index}"},
+            {"$set": {"manifest": key, "part": index, "parts": len(parts), "chunks": part, "created_at": now}},
+            upsert=True,
+        )
+        for index, part in enumerate(parts)
+    ]
+    try:
+        collection = _collection("file_manifests")
+        collection.bulk_write(operations, ordered=False)
+        collection.delete_many({"manifest": key, "part": {"$gte": len(parts)}})
+    except Exception as e:
+        logger.warning(f"File manifest write failed: {e}")
+
+
+def get_vectors(admin_id, model_name: str, hashes: list[str]) -> dict:
+    """Known vectors by chunk hash; hashes not in the store are missing from the result."""
+    if not hashes:
+        return {}
+    keys = {_key(admin_id, model_name, h): h for h in set(hashes)}
+    try:
+        docs = _collection("chunk_embeddings").find({"_id": {"$in": list(keys)}})
+        return {keys[doc["_id"]]: np.frombuffer(doc["vector"], dtype=np.float32).tolist() for doc in docs}
+    except Exception as e:
+        logger.warning(f"Chunk embedding lookup failed: {e}")
+        return {}
+
+
+def save_vectors(admin_id, model_name: str, vectors: dict):
+    if not vectors:
+        return
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"_id": _key(admin_id, model_name, h)},
+            {"$setOnInsert": {"vector": np.asarray(vector, dtype=np.float32).tobytes(), "created_at": now}},
+            upsert=True,
+        )
+        for h, vector in vectors.items()
+    ]
+    try:
+        _collection("chunk_embeddings").bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.warning(f"Chunk embedding write failed: {e}")
+
+
+def embed_with_cache(model_name: str, admin_id, texts: list[str]) -> list[list[float]]:
+    """Embed texts, reusing this admin's stored vectors and embedding only unseen chunks."""
+    if admin_id is None:
+        return get_embedder(model_name).embed_documents(texts)
+
+    hashes = [chunk_hash(text) for text in texts]
+    known = get_vectors(admin_id, model_name, hashes)
+    missing = {h: text for h, text in zip(hashes, texts) if h not in known}
+    if missing:
+        new = dict(zip(missing, get_embedder(model_name).embed_documents(list(missing.values()))))
+        save_vectors(admin_id, model_name, new)
+        known.update(new)
+    return [known[h] for h in hashes]
@@ -0,0 +1,143 @@
+import os
+import json
+import asyncio
+import threading
+
+from langchain_core.embeddings import Embeddings
+from src.logging.logger import logger
+
+
+# Model used for new FAISS indexes. Indexes written before metadata existed were
+# built with all-MiniLM-L6-v2 by the ingestion pipeline.
+DEFAULT_EMBEDDING_MODEL = os.getenv("FAISS_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+LEGACY_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+INDEX_METADATA_FILE = "embedding.json"
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Wraps a local embedding model so concurrent async queries share one forward pass.
+
+    ``aembed_query`` calls arriving within ``max_wait`` seconds of each other are
+    embedded together (up to ``max_batch`` texts) in a worker thread, keeping the
+    model call off the event loop.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch: int = EMBED_MAX_BATCH, max_wait: float = EMBED_BATCH_WAIT_MS / 1000):
+        self.embeddings = embeddings
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = None
+        self._worker = None
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts):
+        return await asyncio.to_thread(self.embeddings.embed_documents, texts)
+
+    async def aembed_query(self, text):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = await asyncio.to_thread(self.embeddings.embed_documents, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+
+def _huggingface(model_name: str) -> Embeddings:
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return BatchedEmbeddings(
+        HuggingFaceEmbeddings(model_name=model_name, model_kwargs={"device": "cpu"})
+    )
+
+
+def _titan(model_name: str) -> Embeddings:
+    from src.embedding.embedding import titan_embed_v1
+    return titan_embed_v1
+
+
+EMBEDDER_FACTORIES = {
+    "sentence-transformers/all-MiniLM-L6-v2": _huggingface,
+    "amazon.titan-embed-text-v1": _titan,
+}
+
+
+# One embedder per model per process
+_embedders = {}
+_dimensions = {}
+_embedders_lock = threading.Lock()
+
+
+def get_embedder(model_name: str = DEFAULT_EMBEDDING_MODEL) -> Embeddings:
+    """Return the process-wide embedder for a model, loading it on first use."""
+    embedder = _embedders.get(model_name)
+    if embedder is not None:
+        return embedder
+    if model_name not in EMBEDDER_FACTORIES:
+        raise ValueError(f"Unknown embedding model '{model_name}'")
+    with _embedders_lock:
+        if model_name not in _embedders:
+            logger.info(f"Loading embedding model {model_name}")
+            _embedders[model_name] = EMBEDDER_FACTORIES[model_name](model_name)
+        return _embedders[model_name]
+
+
+def embedding_dimension(model_name: str = DEFAULT_EMBEDDING_MODEL) -> int:
+    if model_name not in _dimensions:
+        _dimensions[model_name] = len(get_embedder(model_name).embed_query("dimension probe"))
+    return _dimensions[model_name]
+
+
+def warm_up_embedder(model_name: str = DEFAULT_EMBEDDING_MODEL):
+    """Load the model and run one forward pass so the first query doesn't pay for it."""
+    try:
+        embedding_dimension(model_name)
+    except Exception as e:
+        logger.error(f"Embedding model warm-up failed: {e}")
+
+
+def write_index_metadata(path: str, model_name: str, dimension: int):
+    with open(os.path.join(path, INDEX_METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump({"model": model_name, "dimension": dimension}, f)
+
+
+def read_index_metadata(path: str) -> dict:
+    """Embedding model and dimension an index was built with."""
+    metadata_path = os.path.join(path, INDEX_METADATA_FILE)
+    if not os.path.exists(metadata_path):
+        return {"model": LEGACY_EMBEDDING_MODEL, "dimension": None}
+    with open(metadata_path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,190 @@
+import os
+import json
+import weakref
+import time
+import asyncio
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+
+from langchain_community.vectorstores import FAISS
+from src.logging.logger import logger
+from src.vectorstore.embedders import embedding_dimension, get_embedder, read_index_metadata
+
+
+FAISS_BASE_DIR = os.getenv("FAISS_BASE_DIR", "faiss")
+FAISS_CACHE_MAX_BYTES = int(os.getenv("FAISS_CACHE_MAX_MB", "512")) * 1024 * 1024
+# Side index written at ingestion: file_id -> chunk ids in page order
+ID_MAP_FILE = "ids.json"
+
+
+def index_path(thread_id: str) -> str:
+    return f"{FAISS_BASE_DIR}/{thread_id}"
+
+
+def _index_signature(path: str):
+    """(mtime, size) of the files FAISS.save_local writes; None if the index does not exist."""
+    files = [os.path.join(path, "index.faiss"), os.path.join(path, "index.pkl")]
+    try:
+        stats = [os.stat(f) for f in files]
+    except FileNotFoundError:
+        return None
+    return tuple(s.st_mtime_ns for s in stats), sum(s.st_size for s in stats)
+
+
+# Chunk id map of every loaded index, dropped together with the index
+_id_maps = weakref.WeakKeyDictionary()
+
+
+def _read_id_map(path: str, db: FAISS) -> dict:
+    id_map_path = os.path.join(path, ID_MAP_FILE)
+    if os.path.exists(id_map_path):
+        with open(id_map_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # Index written before the map existed: rebuild it once from the docstore
+    id_map = {}
+    for position in sorted(db.index_to_docstore_id):
+        doc_id = db.index_to_docstore_id[position]
+        doc = db.docstore.search(doc_id)
+        id_map.setdefault(doc.metadata.get("file_id"), []).append(doc_id)
+    return id_map
+
+
+def get_id_map(db: FAISS) -> dict:
+    """Copy of a loaded index's file_id -> chunk ids map."""
+    return {file_id: list(ids) for file_id, ids in _id_maps.get(db, {}).items()}
+
+
+def file_chunk_ids(db: FAISS, file_id: str) -> list:
+    return _id_maps.get(db, {}).get(file_id, [])
+
+
+def load_index(path: str) -> FAISS:
+    """Load an index, and its chunk id map, with the embedder it was built with."""
+    # Pin one version even if the thread's link is switched while loading
+    path = os.path.realpath(path)
+    metadata = read_index_metadata(path)
+    db = FAISS.load_local(path, get_embedder(metadata["model"]), allow_dangerous_deserialization=True)
+    # The stored dimension only describes the index; the query embedder must match it too
+    expected = embedding_dimension(metadata["model"])
+    if db.index.d != expected:
+        raise ValueError(
+            f"FAISS index at {path} has dimension {db.index.d}, "
+            f"but its embedding model {metadata['model']} produces {expected}"
+        )
+    if metadata["dimension"] and metadata["dimension"] != db.index.d:
+        raise ValueError(
+            f"FAISS index at {path} has dimension {db.index.d}, "
+            f"but its metadata records {metadata['dimension']}"
+        )
+    _id_maps[db] = _read_id_map(path, db)
+    return db
+
+
+@dataclass
+class _CacheEntry:
+    db: FAISS
+    mtimes: tuple
+    size: int
+
+
+class FaissIndexCache:
+    """
+    Thread-keyed cache of loaded FAISS indexes.
+
+    Loading an index unpickles its docstore and reads the vectors from disk, so
+    loaded indexes are kept in memory and evicted least-recently-used once
+    their on-disk size exceeds the memory budget. Writers call ``invalidate``
+    after saving; a hit is also revalidated against the index files' mtimes so
+    writes from another process are picked up.
+    """
+
+    def __init__(self, max_bytes: int = FAISS_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks = defaultdict(asyncio.Lock)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_time = 0.0
+        self.last_load_time = None
+
+    def _lookup(self, thread_id: str, signature):
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is None:
+                return None
+            if signature is None or entry.mtimes != signature[0]:
+                self._drop(thread_id)
+                return None
+            self._entries.move_to_end(thread_id)
+            return entry.db
+
+    def _drop(self, thread_id: str):
+        entry = self._entries.pop(thread_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _store(self, thread_id: str, db: FAISS, signature):
+        mtimes, size = signature
+        with self._lock:
+            self._drop(thread_id)
+            self._entries[thread_id] = _CacheEntry(db, mtimes, size)
+            self._bytes += size
+            # Keep at least the entry just loaded, even if it alone exceeds the budget
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                evicted, _ = next(iter(self._entries.items()))
+                self._drop(evicted)
+                self.evictions += 1
+
+    async def get(self, thread_id: str) -> FAISS:
+        """Return the thread's index, loading it from disk on a miss."""
+        path = index_path(thread_id)
+        signature = await asyncio.to_thread(_index_signature, path)
+        db = self._lookup(thread_id, signature)
+        if db is not None:
+            self.hits += 1
+            return db
+
+        async with self._load_locks[thread_id]:
+            # Another request may have loaded it while we waited
+            signature = await asyncio.to_thread(_index_signature, path)
+            db = self._lookup(thread_id, signature)
+            if db is not None:
+                self.hits += 1
+                return db
+
+            self.misses += 1
+            start = time.perf_counter()
+            db = await asyncio.to_thread(load_index, path)
+            elapsed = time.perf_counter() - start
+            self.load_time += elapsed
+            self.last_load_time = elapsed
+            logger.info(f"Loaded FAISS index for thread {thread_id} in {elapsed:.2f}s")
+            if signature is not None:
+                self._store(thread_id, db, signature)
+            return db
+
+    def invalidate(self, thread_id: str):
+        with self._lock:
+            self._drop(thread_id)
+
+    def stats(self):
+        loads = self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / (self.hits + self.misses), 3) if self.hits + self.misses else None,
+            "evictions": self.evictions,
+            "avg_load_ms": round(self.load_time / loads * 1000, 2) if loads else None,
+            "last_load_ms": round(self.last_load_time * 1000, 2) if self.last_load_time is not None else None,
+        }
+
+
+faiss_cache = FaissIndexCache()
@@ -0,0 +1,54 @@
+import os
+import json
+import time
+import shutil
+from uuid import uuid4
+
+from langchain_community.vectorstores import FAISS
+from src.vectorstore.embedders import write_index_metadata
+from src.vectorstore.index_cache import FAISS_BASE_DIR, ID_MAP_FILE, index_path
+
+
+# faiss/{thread_id} is a symlink to the current version under faiss/.versions/{thread_id}/,
+# so publishing a new version is a single atomic rename.
+FAISS_VERSIONS_DIR = os.path.join(FAISS_BASE_DIR, ".versions")
+# The previous version is kept so readers that resolved the old link can finish loading it
+FAISS_KEEP_VERSIONS = int(os.getenv("FAISS_KEEP_VERSIONS", "2"))
+
+
+def save_index_atomically(thread_id: str, db: FAISS, model_name: str, id_map: dict):
+    """Write a new version of the thread's index and switch the thread's link to it."""
+    versions_dir = os.path.join(FAISS_VERSIONS_DIR, thread_id)
+    os.makedirs(versions_dir, exist_ok=True)
+    # Time-prefixed so versions sort in write order
+    version = f"{time.time_ns()}-{uuid4().hex[:8]}"
+    tmp_path = os.path.join(versions_dir, f".{version}.tmp")
+    final_path = os.path.join(versions_dir, version)
+
+    db.save_local(tmp_path)
+    write_index_metadata(tmp_path, model_name, db.index.d)
+    with open(os.path.join(tmp_path, ID_MAP_FILE), "w", encoding="utf-8") as f:
+        json.dump(id_map, f)
+    os.rename(tmp_path, final_path)
+
+    link = index_path(thread_id)
+    tmp_link = f"{link}.{version}.link"
+    os.symlink(os.path.relpath(final_path, FAISS_BASE_DIR), tmp_link)
+    if os.path.isdir(link) and not os.path.islink(link):
+        # Index written before versioning: replaced once, non-atomically
+        shutil.rmtree(link)
+    os.replace(tmp_link, link)
+
+    versions = sorted(name for name in os.listdir(versions_dir) if not name.startswith("."))
+    for old in versions[:-FAISS_KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(versions_dir, old), ignore_errors=True)
+
+
+def remove_index(thread_id: str):
+    """Delete a thread's index link and every stored version."""
+    link = index_path(thread_id)
+    if os.path.islink(link) or os.path.isfile(link):
+        os.remove(link)
+    elif os.path.isdir(link):
+        shutil.rmtree(link)
+    shutil.rmtree(os.path.join(FAISS_VERSIONS_DIR, thread_id), ignore_errors=True)
@@ -0,0 +1,78 @@
+import os
+import asyncio
+import weakref
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from src.vectorstore.index_cache import faiss_cache
+
+
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "5"))
+RETRIEVAL_K_PER_FILE = int(os.getenv("RETRIEVAL_K_PER_FILE", "3"))
+RETRIEVAL_MAX_K = int(os.getenv("RETRIEVAL_MAX_K", "15"))
+
+
+# file_id -> index positions, computed once per loaded index
+_file_positions = weakref.WeakKeyDictionary()
+
+
+def _positions_by_file(db: FAISS) -> dict:
+    positions = _file_positions.get(db)
+    if positions is None:
+        positions = {}
+        for position, doc_id in db.index_to_docstore_id.items():
+            file_id = db.docstore.search(doc_id).metadata.get("file_id")
+            positions.setdefault(file_id, []).append(position)
+        positions = {file_id: np.array(ids, dtype="int64") for file_id, ids in positions.items()}
+        _file_positions[db] = positions
+    return positions
+
+
+def adaptive_k(file_count: int) -> int:
+    """More files in scope get more chunks, up to RETRIEVAL_MAX_K."""
+    return min(RETRIEVAL_MAX_K, max(RETRIEVAL_K, RETRIEVAL_K_PER_FILE * file_count))
+
+
+def _search_positions(db: FAISS, vector: np.ndarray, positions: np.ndarray, k: int):
+    """Exact top-k restricted to the given index positions (pre-filtered, not over-fetched)."""
+    k = min(k, len(positions))
+    if k == 0:
+        return []
+    params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(positions))
+    distances, indices = db.index.search(vector, k, params=params)
+    results = []
+    for distance, position in zip(distances[0], indices[0]):
+        if position == -1:
+            continue
+        doc = db.docstore.search(db.index_to_docstore_id[position])
+        results.append((doc, float(distance)))
+    return results
+
+
+async def search_thread(thread_id: str, query: str, file_ids: list[str], k: int | None = None, per_file: bool = False):
+    """
+    Search a thread's index within the given files.
+
+    Returns ``[(Document, distance)]`` with the exact top-k over those files'
+    chunks, or with ``per_file=True`` a dict of exact top-k results per file.
+    """
+    db = await faiss_cache.get(thread_id)
+    positions = _positions_by_file(db)
+    k = k or adaptive_k(len(file_ids))
+
+    vector = np.array([await db.embedding_function.aembed_query(query)], dtype=np.float32)
+    if db._normalize_L2:
+        faiss.normalize_L2(vector)
+
+    if per_file:
+        results = await asyncio.gather(*(
+            asyncio.to_thread(_search_positions, db, vector, positions.get(file_id, np.array([], dtype="int64")), k)
+            for file_id in file_ids
+        ))
+        return dict(zip(file_ids, results))
+
+    scoped = [positions[file_id] for file_id in file_ids if file_id in positions]
+    if not scoped:
+        return []
+    return await asyncio.to_thread(_search_positions, db, vector, np.concatenate(scoped), k)